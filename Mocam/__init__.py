@@ -0,0 +1,2189 @@
+'''
+Copyright (C) 2014 Jacques Lucke
+mail@jlucke.com
+
+Created by Jacques Lucke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+    
+
+Naming convention:
+    camera - the camera object, that means with properties like location, etc.
+    camera_data - camera.data
+'''
+
+
+bl_info =  {
+    "name": "Mocam",
+    "description": "Create professional looking camera animations for you motion graphics.",
+    "author": "Jacques Lucke",
+    "version": (0, 0, 1),
+    "blender": (2, 73, 0),
+    "location": "View3D",
+    "warning": "development",
+    "wiki_url": "",
+    "category": "Animation" }
+    
+
+
+import bpy
+import os
+import sys
+import json
+import time
+import math
+import argparse
+import itertools
+import traceback
+import functools
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from bpy.app.handlers import persistent
+from bpy.props import *
+from operator import attrgetter
+from mathutils import Matrix
+
+# only available since Blender 2.76, auto focus falls back to the view distance without it
+try: from mathutils.bvhtree import BVHTree
+except ImportError: BVHTree = None
+
+from . import mocam_core, mocam_export
+
+
+class ProfileCounter:
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+    @property
+    def mean_time(self):
+        return self.total_time / self.calls if self.calls > 0 else 0.0
+    
+    @property
+    def hit_rate(self):
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups > 0 else 0.0
+    
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "total_time": self.total_time,
+            "mean_time": self.mean_time,
+            "max_time": self.max_time,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "hit_rate": self.hit_rate }
+    
+# when disabled the measured functions only pay for one attribute lookup
+class Profiler:
+    enabled = False
+    counters = {}
+    
+    @classmethod
+    def measure(cls, name):
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not cls.enabled:
+                    return function(*args, **kwargs)
+                start_time = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    cls.add_call(name, time.perf_counter() - start_time)
+            return wrapper
+        return decorator
+    
+    @classmethod
+    def add_call(cls, name, duration):
+        counter = cls.get_counter(name)
+        counter.calls += 1
+        counter.total_time += duration
+        counter.max_time = max(counter.max_time, duration)
+    
+    @classmethod
+    def count_cache(cls, name, hit):
+        if cls.enabled:
+            counter = cls.get_counter(name)
+            if hit:
+                counter.cache_hits += 1
+            else:
+                counter.cache_misses += 1
+                
+    @classmethod
+    def get_counter(cls, name):
+        if name not in cls.counters:
+            cls.counters[name] = ProfileCounter()
+        return cls.counters[name]
+    
+    @classmethod
+    def reset(cls):
+        cls.counters = {}
+        
+    @classmethod
+    def dump_json(cls, filepath):
+        data = {name: counter.as_dict() for name, counter in cls.counters.items()}
+        with open(filepath, "w") as file:
+            json.dump(data, file, indent = 2, sort_keys = True)
+            
+    @classmethod
+    def dump_csv(cls, filepath):
+        columns = ["calls", "total_time", "mean_time", "max_time", "cache_hits", "cache_misses", "hit_rate"]
+        with open(filepath, "w") as file:
+            file.write(",".join(["name"] + columns) + "\n")
+            for name, counter in sorted(cls.counters.items()):
+                values = counter.as_dict()
+                file.write(",".join([name] + [str(values[column]) for column in columns]) + "\n")
+                
+                
+@Profiler.measure("update_mocams")
+def update_mocams(scene):
+    invalidate_updated_targets()
+    return evaluate_mocams(scene)
+    
+@Profiler.measure("evaluate_mocams")
+def evaluate_mocams(scene):
+    mocams = get_evaluated_mocams(scene)
+    frame = scene.frame_current_final
+    for mocam in mocams:
+        if not RenderTable.apply(mocam, frame):
+            mocam.update(frame)
+    return mocams
+    
+    
+class RenderTable:
+    '''
+    Camera samples for the rendered frame and its motion blur subframes,
+    calculated in one batch before the frame is rendered. Mocams whose
+    result depends on animation are left out, because the batch uses the
+    current target poses and settings.
+    '''
+    # camera object pointer -> (frame key -> row, matrices, focus distances)
+    tables = {}
+    
+    @classmethod
+    @Profiler.measure("RenderTable.build")
+    def build(cls, scene):
+        cls.clear()
+        if not scene.mocam.use_render_table:
+            return
+        frames = get_render_frames(scene, scene.frame_current)
+        rows = {get_frame_key(frame): row for row, frame in enumerate(frames)}
+        for mocam in get_evaluated_mocams(scene):
+            mocam.correct_target_list()
+            if not is_static_mocam(mocam):
+                continue
+            matrices, focus_distances = MocamCalculator(mocam).calculate_range(frames)
+            cls.tables[mocam.camera.as_pointer()] = (rows, matrices, focus_distances)
+            
+    @classmethod
+    def apply(cls, mocam, frame):
+        if len(cls.tables) == 0:
+            return False
+        table = cls.tables.get(mocam.camera.as_pointer())
+        if table is None:
+            return False
+        rows, matrices, focus_distances = table
+        row = rows.get(get_frame_key(frame))
+        Profiler.count_cache("RenderTable", row is not None)
+        if row is None:
+            return False
+        result = CalculationResult()
+        result.matrix_world = Matrix(matrices[row].tolist())
+        result.focus_distance = float(focus_distances[row])
+        mocam.set_calculation_result(result)
+        return True
+    
+    @classmethod
+    def clear(cls):
+        cls.tables = {}
+        
+# the frame with the subframes Blender Internal (shutter * i / samples)
+# and Cycles (shutter / 2 around the frame) use for motion blur
+def get_render_frames(scene, frame):
+    render = scene.render
+    offsets = [0.0]
+    if render.use_motion_blur:
+        samples = render.motion_blur_samples
+        shutter = render.motion_blur_shutter
+        offsets.extend(shutter * i / samples for i in range(1, samples + 1))
+        offsets.extend((-shutter / 2, shutter / 2))
+    return sorted(set(get_frame_key(frame + offset) for offset in offsets))
+    
+def get_frame_key(frame):
+    return round(frame, 4)
+
+# the paths MocamBaker writes, keyframes on them only come from an earlier bake
+baked_data_paths = {"location", "rotation_euler", "rotation_quaternion", "scale", "dof_distance"}
+
+# False when the camera path can change from frame to frame without a change of the
+# Mocam itself: animated targets, lens or sensor, or keyframed loads, stays and indices
+def is_static_mocam(mocam):
+    camera = mocam.camera
+    if is_animated(camera, baked_data_paths) or is_animated(camera.data, baked_data_paths):
+        return False
+    return all(is_static_object(target.object) for target in mocam.get_targets())
+
+def is_static_object(object):
+    if is_animated(object) or is_animated(object.data):
+        return False
+    if len(object.constraints) > 0:
+        return False
+    return object.parent is None or is_static_object(object.parent)
+    
+def is_animated(id, ignored_data_paths = ()):
+    if id is None or id.animation_data is None:
+        return False
+    if len(id.animation_data.drivers) > 0:
+        return True
+    action = id.animation_data.action
+    if action is None:
+        return False
+    return any(fcurve.data_path not in ignored_data_paths for fcurve in action.fcurves)
+    
+    
+class UpdateScheduler:
+    '''
+    Decides when the cameras have to be evaluated. A frame change always
+    evaluates them (with subframes, so motion blur works), while a scene
+    update only does when it touched a target, a mocam camera or the mocam
+    properties. Blender calls scene_update_post once per main loop iteration,
+    so a burst of changes like dragging an object results in one evaluation.
+    '''
+    
+    last_frame = None
+    last_generation = None
+    last_scope_key = None
+    cameras = []
+    
+    @classmethod
+    @Profiler.measure("UpdateScheduler.frame_changed")
+    def frame_changed(cls, scene):
+        cls.evaluate(scene, update_mocams)
+        
+    @classmethod
+    @Profiler.measure("UpdateScheduler.scene_updated")
+    def scene_updated(cls, scene):
+        # frame_change_post runs after this handler for the same update and
+        # evaluates the new frame, doing it here too would calculate it twice
+        if cls.frame_changed_since_evaluation(scene): return
+        if cls.needs_evaluation(scene):
+            cls.evaluate(scene, evaluate_mocams)
+            
+    @classmethod
+    def evaluate(cls, scene, function):
+        mocams = function(scene)
+        cls.cameras = [mocam.camera for mocam in mocams]
+        cls.last_frame = scene.frame_current_final
+        cls.last_generation = ObjectFinder.generation
+        cls.last_scope_key = get_scope_key(scene)
+        
+    @classmethod
+    def needs_evaluation(cls, scene):
+        # targets have to be invalidated even when another change already decided it
+        targets_changed = invalidate_updated_targets()
+        if targets_changed: return True
+        if cls.last_frame is None: return True
+        if ObjectFinder.generation != cls.last_generation: return True
+        # a camera that became the scene camera or is looked through now
+        if get_scope_key(scene) != cls.last_scope_key: return True
+        if bpy.data.cameras.is_updated: return True
+        if bpy.data.objects.is_updated:
+            return any(camera.is_updated for camera in cls.cameras)
+        return False
+        
+    @classmethod
+    def frame_changed_since_evaluation(cls, scene):
+        # nothing was evaluated yet after loading the file
+        if cls.last_frame is None: return False
+        return scene.frame_current_final != cls.last_frame
+        
+    @classmethod
+    def reset(cls):
+        cls.last_frame = None
+        cls.last_generation = None
+        cls.last_scope_key = None
+        cls.cameras = []
+        
+@persistent
+def mocam_frame_changed(scene):
+    UpdateScheduler.frame_changed(scene)
+    
+@persistent
+def mocam_scene_updated(scene):
+    UpdateScheduler.scene_updated(scene)
+
+@persistent
+def build_render_table(scene):
+    RenderTable.build(scene)
+    
+@persistent
+def clear_render_table(scene):
+    RenderTable.clear()
+
+@persistent
+def invalidate_caches(scene):
+    ObjectFinder.invalidate_index()
+    timeline_cache.clear()
+    evaluation_states.clear()
+    shared_target_cache.clear()
+    camera_list_cache.clear()
+    panel_view_models.clear()
+    BVHCache.clear()
+    RenderTable.clear()
+    UpdateScheduler.reset()
+    
+def invalidate_updated_targets():
+    ObjectFinder.ensure_index()
+    if ObjectFinder.needs_repair:
+        ObjectFinder.repair_identifiers()
+    invalidated = False
+    if bpy.data.objects.is_updated:
+        invalidated = shared_target_cache.invalidate_updated_objects()
+        BVHCache.invalidate_updated_objects()
+    return invalidated
+    
+@persistent
+def repair_identifiers_after_load(scene):
+    for camera in bpy.data.objects:
+        if camera.type == "CAMERA":
+            Mocam(camera).migrate_target_items()
+    ObjectFinder.rebuild_index()
+    ObjectFinder.repair_identifiers()
+    
+@persistent
+def load_profiler_settings(scene):
+    Profiler.enabled = bpy.context.scene.mocam.enable_profiling
+
+def get_selected_mocam():
+    camera = get_selected_camera()
+    if camera:
+        return Mocam(camera)
+    
+def get_selected_camera():
+    cameras = get_cameras()
+    if len(cameras) == 0:
+        return None
+    elif len(cameras) == 1:
+        return cameras[0]
+    scene = bpy.context.scene
+    return scene.objects.get(scene.mocam.selected_camera_name)
+
+def get_active_mocams():
+    return [Mocam(camera) for camera in get_cameras() if camera.data.mocam.active]
+
+# the active mocams within the evaluation scope of the scene
+def get_evaluated_mocams(scene):
+    scope = scene.mocam.evaluation_scope
+    if scope == "ALL":
+        return get_active_mocams()
+    cameras = get_scope_cameras(scene, scope)
+    return [Mocam(camera) for camera in cameras if camera.type == "CAMERA" and camera.data.mocam.active]
+
+def get_scope_cameras(scene, scope):
+    cameras = [scene.camera] if scene.camera else []
+    if scope == "VIEWS":
+        for camera in get_view_cameras(scene):
+            if camera not in cameras:
+                cameras.append(camera)
+    return cameras
+
+# cameras that 3D views of this scene currently look through
+def get_view_cameras(scene):
+    cameras = []
+    for window in bpy.context.window_manager.windows:
+        if window.screen.scene != scene:
+            continue
+        for area in window.screen.areas:
+            if area.type != "VIEW_3D":
+                continue
+            space = area.spaces.active
+            if space.region_3d.view_perspective != "CAMERA":
+                continue
+            camera = scene.camera if space.lock_camera_and_layers else space.camera
+            if camera:
+                cameras.append(camera)
+    return cameras
+
+def get_scope_key(scene):
+    scope = scene.mocam.evaluation_scope
+    if scope == "ALL":
+        return scope
+    return (scope, tuple(camera.as_pointer() for camera in get_scope_cameras(scene, scope)))
+def get_camera_names():
+    return [camera.name for camera in get_cameras()]
+def get_cameras():
+    scene = bpy.context.scene
+    key = (scene.as_pointer(), len(scene.objects), ObjectFinder.generation)
+    is_up_to_date = camera_list_cache.get("key") == key
+    Profiler.count_cache("get_cameras", is_up_to_date)
+    if not is_up_to_date:
+        camera_list_cache["key"] = key
+        camera_list_cache["cameras"] = [object for object in scene.objects if object.type == "CAMERA"]
+    return list(camera_list_cache["cameras"])
+
+
+# scene key -> cameras in that scene
+camera_list_cache = {}
+# camera data pointer -> PanelViewModel
+panel_view_models = {}
+# camera data pointer -> ((loads, stays, target indices), mocam_core.Timeline)
+timeline_cache = {}
+# camera object pointer -> EvaluationState
+evaluation_states = {}
+
+class Mocam:
+    def __init__(self, camera):
+        self.camera = camera
+        self.props = camera.data.mocam
+        
+    def update(self, frame):
+        state = self.evaluation_state
+        if state.target_list_key != self.target_list_key:
+            self.correct_target_list()
+            state.target_list_key = self.target_list_key
+            
+        move_data = self.get_move_data(frame)
+        dependency_key = (frame, self.props.revision, get_framing_key(self.framing), self.get_dependency_key(move_data))
+        is_up_to_date = state.result is not None and state.dependency_key == dependency_key
+        Profiler.count_cache("Mocam.update", is_up_to_date)
+        if not is_up_to_date:
+            calculator = MocamCalculator(self)
+            state.result = calculator.calculate_move_data(move_data)
+            state.dependency_key = dependency_key
+        self.set_calculation_result(state.result)
+        
+    def set_calculation_result(self, result, epsilon = 1e-5):
+        if not matrices_are_close(self.camera.matrix_world, result.matrix_world, epsilon):
+            self.camera.matrix_world = result.matrix_world
+        if abs(self.camera.data.dof_distance - result.focus_distance) > epsilon:
+            self.camera.data.dof_distance = result.focus_distance
+            
+    @property
+    def evaluation_state(self):
+        key = self.camera.as_pointer()
+        if key not in evaluation_states:
+            evaluation_states[key] = EvaluationState()
+        return evaluation_states[key]
+    
+    @property
+    def target_list_key(self):
+        return (self.props.revision, ObjectFinder.generation)
+        
+    def add_target(self, object):
+        self.add_targets([object])
+        
+    @Profiler.measure("Mocam.add_targets")
+    def add_targets(self, objects):
+        '''
+        Append the objects as targets in the given order, the camera itself is skipped.
+        '''
+        objects = [object for object in objects if object != self.camera]
+        if len(objects) == 0:
+            return
+        
+        ObjectFinder.ensure_index()
+        items = self.props.targets
+        next_index = len(items)
+        for object in objects:
+            ObjectFinder.create_first_identifier(object)
+            item = items.add()
+            item.index = next_index
+            item.object_name = object.name
+            item.identifier = object.mocam.identifier
+            ObjectFinder.correct_item_and_object(item)
+            next_index += 1
+        self.set_correct_indices()
+        self.create_missing_move_items(len(items))
+        self.mark_as_changed()
+        
+    @Profiler.measure("Mocam.remove_targets")
+    def remove_targets(self, indices):
+        indices = set(indices)
+        positions = [position for position, item in enumerate(self.props.targets) if item.index in indices]
+        self.remove_target_items(positions)
+        
+    def remove_target_items(self, positions):
+        # removing from the back shifts as few items as possible
+        for position in sorted(positions, reverse = True):
+            self.props.targets.remove(position)
+        if len(positions) > 0:
+            self.set_correct_indices()
+            self.mark_as_changed()
+            
+    @Profiler.measure("Mocam.reorder_targets")
+    def reorder_targets(self, order):
+        '''
+        order[i] is the current index of the target that gets the index i.
+        '''
+        self.set_correct_indices()
+        items = sorted(self.props.targets, key = attrgetter("index"))
+        if sorted(order) != list(range(len(items))):
+            raise ValueError("order has to be a permutation of the target indices")
+        for new_index, old_index in enumerate(order):
+            set_if_different(items[old_index], "index", new_index)
+        self.mark_as_changed()
+        
+    def get_targets(self):
+        return TargetList(self.props.targets, self.target_cache)
+    
+    @Profiler.measure("Mocam.correct_target_list")
+    def correct_target_list(self):
+        self.migrate_target_items()
+        self.correct_target_objects()
+        self.remove_targets_without_object()
+        self.set_correct_indices()
+        self.create_missing_move_items(len(self.props.targets))
+        
+    def correct_target_objects(self):
+        for item in self.props.targets:
+            ObjectFinder.correct_item_and_object(item)
+            
+    # files of older versions store identifier and name only in the nested item.object
+    def migrate_target_items(self):
+        items = self.props.targets
+        identifiers = read_property_array(items, "identifier", np.int32)
+        for position in np.flatnonzero(identifiers == 0).tolist():
+            item = items[position]
+            if item.object.identifier != 0:
+                item.identifier = item.object.identifier
+                item.object_name = item.object.object_name
+        
+    def remove_targets_without_object(self):
+        positions = []
+        for position, item in enumerate(self.props.targets):
+            target = self.get_target(item)
+            if not target.object:
+                positions.append(position)
+        self.remove_target_items(positions)
+            
+    def set_correct_indices(self):
+        items = list(self.props.targets)
+        items.sort(key = attrgetter("index"))
+        for i, item in enumerate(items):
+            if item.index != i:
+                item.index = i
+            
+    def get_target_from_index(self, index):
+        item = self.get_target_item_from_index(index)
+        if item:
+            return self.get_target(item)
+        
+    def get_target(self, item):
+        return Target(item, self.target_cache.get_state(item))
+    
+    # shared by all cameras, so that every object is resolved and measured only once
+    @property
+    def target_cache(self):
+        return shared_target_cache
+    
+    # depends on the lens, so it is not stored in the shared target states
+    @property
+    def framing(self):
+        return get_framing(self.camera, self.props)
+            
+    def get_target_item_from_index(self, index):
+        position = self.timeline.target_positions.get(index)
+        if position is not None:
+            return self.props.targets[position]
+            
+    def remove_target_with_index(self, index):
+        self.remove_targets([index])
+        
+    def change_indices(self, index_a, index_b):
+        item_a = self.get_target_item_from_index(index_a)
+        item_b = self.get_target_item_from_index(index_b)
+        if item_a and item_b:
+            item_a.index = index_b
+            item_b.index = index_a
+            
+    def get_move_item(self, index):
+        self.create_missing_move_items(index + 1)
+        return self.props.moves[index]
+                
+    def create_missing_move_items(self, amount):
+        move_items = self.props.moves
+        missing_items_amount = max(amount - len(move_items), 0)
+        for i in range(missing_items_amount):
+            item = move_items.add()
+            if len(move_items) == 1:
+                item.load = 0    
+        if missing_items_amount > 0:
+            self.mark_as_changed()
+            
+    def get_move_data(self, frame):
+        return self.timeline.get_move_data(frame)
+    
+    def get_dependency_key(self, move_data):
+        # the timing can be animated, so it is part of the key
+        key = [(move_data.move_index, move_data.load, move_data.frame_in_move)]
+        for index in (move_data.target_start, move_data.target_end):
+            target = self.get_target_from_index(index)
+            key.append((index, target.state_key if target else None))
+        return tuple(key)
+    
+    def get_start_frame_of_index(self, index):
+        self.create_missing_move_items(index + 1)
+        return self.timeline.get_end_frame(index)
+    
+    # the values are compared instead of the revision, because F-curves and
+    # drivers change load, stay and index without the update callbacks
+    @property
+    def timeline(self):
+        self.create_missing_move_items(len(self.props.targets))
+        arrays = (read_property_array(self.props.moves, "load", np.float32),
+                  read_property_array(self.props.moves, "stay", np.float32),
+                  read_property_array(self.props.targets, "index", np.int32))
+        key = self.camera.data.as_pointer()
+        cached_arrays, timeline = timeline_cache.get(key, (None, None))
+        is_up_to_date = cached_arrays is not None and all(np.array_equal(a, b) for a, b in zip(arrays, cached_arrays))
+        Profiler.count_cache("Mocam.timeline", is_up_to_date)
+        if not is_up_to_date:
+            loads, stays, target_indices = arrays
+            timeline = mocam_core.Timeline(loads.tolist(), stays.tolist(), target_indices.tolist())
+            timeline_cache[key] = (arrays, timeline)
+        return timeline
+    
+    def mark_as_changed(self):
+        self.props.revision += 1
+    
+    @property
+    def last_target(self):
+        return self.get_target_from_index(len(self.props.targets)-1)
+        
+    @property
+    def active(self):
+        return self.props.active
+    @active.setter
+    def active(self, active):
+        self.props.active = active
+        
+    @property
+    def properties(self):
+        return self.props
+    
+    
+class EvaluationState:
+    def __init__(self):
+        self.target_list_key = None
+        self.dependency_key = None
+        self.result = None
+        
+        
+class MocamCalculator:
+    def __init__(self, mocam):
+        self.mocam = mocam
+        self.calculator = mocam_core.Calculator(mocam.timeline, TargetPoses(mocam, mocam.framing))
+        
+    def calculate(self, frame):
+        move_data = self.mocam.get_move_data(frame)
+        return self.calculate_move_data(move_data)
+        
+    @Profiler.measure("MocamCalculator.calculate")
+    def calculate_move_data(self, move_data):
+        matrix, focus_distance = self.calculator.calculate_move_data(move_data)
+        result = CalculationResult()
+        result.matrix_world = Matrix(matrix.tolist())
+        result.focus_distance = focus_distance
+        if self.mocam.props.use_auto_focus:
+            result.focus_distance = self.find_focus_distance(move_data, result.matrix_world, focus_distance)
+        return result
+    
+    @Profiler.measure("MocamCalculator.calculate_range")
+    def calculate_range(self, frames):
+        matrices, focus_distances = self.calculate_path(frames)
+        return matrices, self.get_focus_distances(frames, matrices, focus_distances)
+    
+    def calculate_path(self, frames):
+        path_cache = get_path_cache()
+        if path_cache is None:
+            return self.calculator.calculate_range(frames)
+        
+        pose_arrays = self.calculator.get_pose_arrays()
+        key = mocam_core.calc_path_key(self.calculator.timeline, pose_arrays, frames)
+        path = path_cache.load(key)
+        Profiler.count_cache("PathCache", path is not None)
+        if path is None:
+            path = self.calculator.calculate_range(frames)
+            # failing to write the cache only costs the next bake some time
+            path_cache.store(key, *path)
+        return path
+    
+    def iterate_range(self, frames, chunk_size = 1024):
+        for frames, matrices, focus_distances, target_indices in self.calculator.iterate_range(frames, chunk_size):
+            yield frames, matrices, self.get_focus_distances(frames, matrices, focus_distances), target_indices
+            
+    def get_focus_distances(self, frames, matrices, focus_distances):
+        if not self.mocam.props.use_auto_focus:
+            return focus_distances
+        timeline = self.calculator.timeline
+        return np.array([self.find_focus_distance(timeline.get_move_data(frame), Matrix(matrix.tolist()), focus_distance)
+            for frame, matrix, focus_distance in zip(frames, matrices, focus_distances)])
+            
+    @Profiler.measure("MocamCalculator.find_focus_distance")
+    def find_focus_distance(self, move_data, matrix_world, fallback):
+        if move_data.has_no_targets:
+            return fallback
+        if move_data.has_both_targets and move_data.is_moving:
+            indices = [move_data.target_start, move_data.target_end]
+        else:
+            indices = [move_data.current_target]
+        targets = [self.mocam.get_target_from_index(index) for index in indices]
+        objects = [target.object for target in targets if target]
+        focus_distance = calc_focus_distance(matrix_world, objects)
+        return fallback if focus_distance is None else focus_distance
+    
+def iterate_path(mocam, frames, chunk_size = 1024):
+    '''
+    Yields (frames, matrices, focus distances, active target indices) chunks
+    of the camera path. A Mocam that depends on animation (see is_static_mocam)
+    is calculated at every frame after the scene has been set to it.
+    '''
+    if is_static_mocam(mocam):
+        return MocamCalculator(mocam).iterate_range(frames, chunk_size)
+    return iterate_animated_path(mocam, frames, chunk_size)
+    
+# the scene goes back to its frame when the iteration ends or is closed
+def iterate_animated_path(mocam, frames, chunk_size = 1024):
+    scene = bpy.context.scene
+    frame_current, subframe = scene.frame_current, scene.frame_subframe
+    frames = iter(frames)
+    try:
+        while True:
+            chunk = np.fromiter(itertools.islice(frames, chunk_size), dtype = np.float64)
+            if len(chunk) == 0:
+                return
+            yield calculate_animated_frames(mocam, scene, chunk)
+    finally:
+        scene.frame_set(frame_current, subframe)
+        
+@Profiler.measure("calculate_animated_frames")
+def calculate_animated_frames(mocam, scene, frames):
+    matrices = np.empty((len(frames), 4, 4))
+    focus_distances = np.empty(len(frames))
+    target_indices = np.empty(len(frames), dtype = np.int64)
+    for i, frame in enumerate(frames.tolist()):
+        scene.frame_set(int(math.floor(frame)), frame - math.floor(frame))
+        # the is_updated flags are already cleared when frame_set returns
+        for target in mocam.get_targets():
+            target.state.invalidate()
+            BVHCache.remove(target.object)
+        calculator = MocamCalculator(mocam)
+        result = calculator.calculate(frame)
+        matrices[i] = np.array(result.matrix_world)
+        focus_distances[i] = result.focus_distance
+        target_indices[i] = calculator.calculator.get_active_targets([frame])[0]
+    return frames, matrices, focus_distances, target_indices
+    
+# distance along the view axis of the camera to the nearest surface of the objects
+def calc_focus_distance(matrix_world, objects):
+    origin = matrix_world.to_translation()
+    direction = -matrix_world.col[2].xyz.normalized()
+    nearest_distance = None
+    for object in objects:
+        tree = BVHCache.get_tree(object)
+        if tree is None:
+            continue
+        inverse = object.matrix_world.inverted()
+        location = tree.ray_cast(inverse * origin, inverse.to_3x3() * direction)[0]
+        if location is None:
+            continue
+        distance = (object.matrix_world * location - origin).dot(direction)
+        if distance > 0 and (nearest_distance is None or distance < nearest_distance):
+            nearest_distance = distance
+    return nearest_distance
+    
+    
+# BVH trees in object space, so they only have to be rebuilt when the geometry changes
+class BVHCache:
+    # object pointer -> (object, tree or None)
+    trees = {}
+    generation = -1
+    
+    @classmethod
+    def get_tree(cls, object):
+        if BVHTree is None:
+            return None
+        cls.ensure_valid_objects()
+        key = object.as_pointer()
+        entry = cls.trees.get(key)
+        Profiler.count_cache("BVHCache", entry is not None)
+        if entry is None:
+            entry = (object, cls.create_tree(object))
+            cls.trees[key] = entry
+        return entry[1]
+    
+    @classmethod
+    @Profiler.measure("BVHCache.create_tree")
+    def create_tree(cls, object):
+        try: return BVHTree.FromObject(object, bpy.context.scene)
+        except (ValueError, TypeError, RuntimeError):
+            # objects without a mesh like empties
+            return None
+        
+    @classmethod
+    def remove(cls, object):
+        cls.trees.pop(object.as_pointer(), None)
+        
+    @classmethod
+    def invalidate_updated_objects(cls):
+        cls.ensure_valid_objects()
+        for key, (object, tree) in list(cls.trees.items()):
+            if object.is_updated_data:
+                del cls.trees[key]
+                
+    # removed objects must not be accessed anymore
+    @classmethod
+    def ensure_valid_objects(cls):
+        if cls.generation != ObjectFinder.generation:
+            cls.clear()
+                
+    @classmethod
+    def clear(cls):
+        cls.trees = {}
+        cls.generation = ObjectFinder.generation
+    
+def get_framing(camera, props):
+    if not props.use_auto_framing or camera.data.type != "PERSP":
+        return None
+    render = bpy.context.scene.render
+    aspect = (render.resolution_x * render.pixel_aspect_x) / (render.resolution_y * render.pixel_aspect_y)
+    data = camera.data
+    tan_x, tan_y = mocam_core.calc_field_of_view_tangents(data.lens, data.sensor_width, data.sensor_height, data.sensor_fit, aspect)
+    return mocam_core.Framing(tan_x, tan_y, props.framing_margin)
+    
+def get_path_cache():
+    settings = bpy.context.scene.mocam
+    # the cache is stored next to the .blend file, so unsaved files have none
+    if not settings.use_path_cache or bpy.data.filepath == "":
+        return None
+    directory = bpy.path.abspath("//mocam_cache")
+    return mocam_core.PathCache(directory, settings.path_cache_size * 1024 * 1024)
+        
+    
+class TargetPoses:
+    def __init__(self, mocam, framing):
+        self.mocam = mocam
+        self.framing = framing
+        
+    def get(self, index):
+        target = self.mocam.get_target_from_index(index)
+        if target:
+            return target.position_matrix, target.state.get_view_matrix(self.framing)
+        
+    def get_pose(self, index):
+        target = self.mocam.get_target_from_index(index)
+        if target:
+            return target.state.get_pose(self.framing)
+        
+    def get_segment(self, start, end):
+        start_target = self.mocam.get_target_from_index(start)
+        end_target = self.mocam.get_target_from_index(end)
+        return self.mocam.target_cache.get_segment(start_target.state, end_target.state, self.framing)
+    
+    
+class CalculationResult:
+    def __init__(self):
+        self.matrix_world = Matrix.Identity(4)
+        self.focus_distance = 1 
+    
+    
+class MocamBaker:
+    def __init__(self, mocam):
+        self.mocam = mocam
+        self.camera = mocam.camera
+        
+    def bake(self, frames):
+        self.prepare()
+        if is_static_mocam(self.mocam):
+            matrices, focus_distances = MocamCalculator(self.mocam).calculate_range(frames)
+            self.add_frames(frames, matrices, focus_distances)
+        else:
+            for chunk, matrices, focus_distances, target_indices in iterate_animated_path(self.mocam, frames):
+                self.add_frames(chunk.tolist(), matrices, focus_distances)
+        self.write_keyframes()
+        self.finish()
+        
+    # prepare, add_frames (can be called for many chunks), write_keyframes, finish
+    def prepare(self):
+        self.mocam.target_cache.clear()
+        self.mocam.correct_target_list()
+        camera = self.camera
+        if camera.rotation_mode == "AXIS_ANGLE":
+            camera.rotation_mode = "XYZ"
+        self.use_quaternion = camera.rotation_mode == "QUATERNION"
+        self.parent_inverse = self.get_parent_inverse()
+        self.frames = []
+        self.locations, self.rotations, self.scales = [], [], []
+        self.focus_distances = []
+        self.written_amount = 0
+        
+    @Profiler.measure("MocamBaker.add_frames")
+    def add_frames(self, frames, matrices, focus_distances):
+        rotation_mode = self.camera.rotation_mode
+        previous_rotation = self.rotations[-1] if len(self.rotations) > 0 else None
+        for matrix in matrices:
+            location, rotation, scale = (self.parent_inverse * Matrix(matrix.tolist())).decompose()
+            if self.use_quaternion:
+                if previous_rotation is not None and previous_rotation.dot(rotation) < 0:
+                    rotation.negate()
+            elif previous_rotation is None:
+                rotation = rotation.to_euler(rotation_mode)
+            else:
+                rotation = rotation.to_euler(rotation_mode, previous_rotation)
+            previous_rotation = rotation
+            self.locations.append(location)
+            self.rotations.append(rotation)
+            self.scales.append(scale)
+        self.frames.extend(frames)
+        self.focus_distances.extend(np.asarray(focus_distances).tolist())
+        
+    # writes the frames added since the last call, the first call replaces the old keyframes
+    @Profiler.measure("MocamBaker.write_keyframes")
+    def write_keyframes(self):
+        start = self.written_amount
+        frames = self.frames[start:]
+        if len(frames) == 0:
+            return
+        write = replace_keyframes if start == 0 else append_keyframes
+        camera = self.camera
+        locations, rotations, scales = self.locations[start:], self.rotations[start:], self.scales[start:]
+        rotation_path = "rotation_quaternion" if self.use_quaternion else "rotation_euler"
+        for index in range(3):
+            write(camera, "location", index, frames, [location[index] for location in locations])
+            write(camera, "scale", index, frames, [scale[index] for scale in scales])
+        for index in range(4 if self.use_quaternion else 3):
+            write(camera, rotation_path, index, frames, [rotation[index] for rotation in rotations])
+        write(camera.data, "dof_distance", 0, frames, self.focus_distances[start:])
+        self.written_amount = len(self.frames)
+        
+    def finish(self):
+        self.mocam.active = False
+        
+    def get_parent_inverse(self):
+        if self.camera.parent is None:
+            return Matrix.Identity(4)
+        return (self.camera.parent.matrix_world * self.camera.matrix_parent_inverse).inverted()
+    
+def export_camera_path(mocam, filepath, frames, file_format = "BINARY", chunk_size = 1024):
+    '''
+    Write matrix_world, focus distance and active target index of every
+    frame into a file (see mocam_export for the formats). The frames are
+    calculated and written in chunks. Returns the amount of written frames.
+    '''
+    mocam.target_cache.clear()
+    mocam.correct_target_list()
+    chunks = iterate_path(mocam, frames, chunk_size)
+    return mocam_export.write_path(filepath, chunks, file_format)
+    
+def get_bake_frames(frame_start, frame_end, subframe_step):
+    amount = int(round((frame_end - frame_start) / subframe_step)) + 1
+    return [frame_start + i * subframe_step for i in range(max(amount, 0))]
+    
+def replace_keyframes(id, data_path, index, frames, values):
+    fcurves = get_action(id).fcurves
+    fcurve = find_fcurve(fcurves, data_path, index)
+    if fcurve is not None:
+        fcurves.remove(fcurve)
+    append_keyframes(id, data_path, index, frames, values)
+    
+def append_keyframes(id, data_path, index, frames, values):
+    fcurves = get_action(id).fcurves
+    fcurve = find_fcurve(fcurves, data_path, index)
+    if fcurve is None:
+        fcurve = fcurves.new(data_path, index = index)
+    
+    points = fcurve.keyframe_points
+    start = len(points)
+    amount = len(frames)
+    points.add(amount)
+    if start == 0:
+        points.foreach_set("co", [value for pair in zip(frames, values) for value in pair])
+    else:
+        # foreach_set always writes the whole collection, so only the new points are set
+        for i, frame, value in zip(range(start, start + amount), frames, values):
+            points[i].co = (frame, value)
+    # foreach_set only supports boolean, int and float properties, not enums
+    for i in range(start, start + amount):
+        points[i].interpolation = "LINEAR"
+    fcurve.update()
+    
+def get_action(id):
+    if id.animation_data is None:
+        id.animation_data_create()
+    if id.animation_data.action is None:
+        id.animation_data.action = bpy.data.actions.new(id.name + "Action")
+    return id.animation_data.action
+    
+def find_fcurve(fcurves, data_path, index):
+    for fcurve in fcurves:
+        if fcurve.data_path == data_path and fcurve.array_index == index:
+            return fcurve
+    return None
+        
+    
+class ObjectFinder:
+    identifier_index = {}
+    indexed_object_amount = -1
+    highest_identifier = 0
+    # set when the index contains objects that share an identifier
+    needs_repair = False
+    # changes whenever objects could be found differently than before
+    generation = 0
+    
+    @classmethod
+    @Profiler.measure("ObjectFinder.get_object")
+    def get_object(cls, item):
+        objects = cls.get_objects_with_identifier(item.identifier)
+        for object in objects:
+            if object.name == item.object_name:
+                return object
+        object = cls.get_object_by_name(item.object_name)
+        if object:
+            return object
+        if len(objects) > 0:
+            return objects[0]
+    
+    @classmethod    
+    @Profiler.measure("ObjectFinder.correct_item_and_object")
+    def correct_item_and_object(cls, item):
+        objects = cls.get_objects_with_identifier(item.identifier)
+        amount = len(objects)
+        if amount == 0:
+            set_if_different(item, "object_name", "")
+            set_if_different(item, "identifier", -1)
+        elif amount == 1:
+            set_if_different(item, "object_name", objects[0].name)
+            set_if_different(item, "identifier", objects[0].mocam.identifier)
+        else:
+            # the duplicates get new identifiers in repair_identifiers,
+            # until then the name decides which object is meant
+            if all(object.name != item.object_name for object in objects):
+                item.object_name = objects[0].name
+    
+    @classmethod
+    def create_first_identifier(cls, object):
+        if object.mocam.identifier == 0:
+            cls.set_new_identifier(object) 
+    @classmethod
+    def set_new_identifier(cls, object):
+        cls.remove_from_index(object)
+        object.mocam.identifier = cls.allocate_identifier()
+        cls.add_to_index(object)
+        cls.generation += 1
+        
+    @classmethod
+    def allocate_identifier(cls):
+        # the counter is saved in the scenes so that identifiers of deleted
+        # objects are not handed out again after reloading the file
+        stored_identifier = max([scene.mocam.next_identifier for scene in bpy.data.scenes] + [1])
+        identifier = max(stored_identifier, cls.highest_identifier + 1)
+        cls.highest_identifier = identifier
+        bpy.context.scene.mocam.next_identifier = identifier + 1
+        return identifier
+    
+    @classmethod
+    @Profiler.measure("ObjectFinder.repair_identifiers")
+    def repair_identifiers(cls):
+        '''
+        Give a new identifier to every object that shares its identifier with
+        another one (e.g. after duplicating). The object that is referenced by
+        name in a target list keeps the old identifier.
+        '''
+        cls.ensure_index()
+        target_names = {}
+        for camera in bpy.data.cameras:
+            for item in camera.mocam.targets:
+                target_names.setdefault(item.identifier, set()).add(item.object_name)
+                
+        for identifier, objects in list(cls.identifier_index.items()):
+            if len(objects) < 2:
+                continue
+            names = target_names.get(identifier, set())
+            kept_object = next((object for object in objects if object.name in names), objects[0])
+            for object in list(objects):
+                if object != kept_object:
+                    cls.set_new_identifier(object)
+        cls.needs_repair = False
+        
+    @classmethod
+    def get_object_by_name(cls, name):
+        return bpy.data.objects.get(name)
+    @classmethod
+    def get_objects_with_identifier(cls, identifier):
+        generation = cls.generation
+        objects = cls.identifier_index.get(identifier)
+        if objects is None:
+            cls.ensure_index()
+            objects = cls.identifier_index.get(identifier, [])
+        if any(object.mocam.identifier != identifier for object in objects):
+            cls.rebuild_index()
+            objects = cls.identifier_index.get(identifier, [])
+        Profiler.count_cache("ObjectFinder.index", generation == cls.generation)
+        return list(objects)
+    
+    # the index only has to be rebuilt when objects are added or removed,
+    # renaming is no problem because the objects are stored by identifier.
+    # Counting the objects is not free, so lookups of known identifiers
+    # rely on update_mocams to call this once per update
+    @classmethod
+    def ensure_index(cls):
+        if cls.indexed_object_amount != len(bpy.data.objects):
+            cls.rebuild_index()
+            
+    @classmethod
+    def rebuild_index(cls):
+        cls.identifier_index = {}
+        cls.needs_repair = False
+        for object in bpy.data.objects:
+            cls.add_to_index(object)
+        cls.indexed_object_amount = len(bpy.data.objects)
+        cls.generation += 1
+        
+    @classmethod
+    def invalidate_index(cls):
+        cls.identifier_index = {}
+        cls.indexed_object_amount = -1
+        cls.highest_identifier = 0
+        cls.generation += 1
+            
+    @classmethod
+    def add_to_index(cls, object):
+        identifier = object.mocam.identifier
+        if identifier != 0:
+            objects = cls.identifier_index.setdefault(identifier, [])
+            if len(objects) > 0:
+                cls.needs_repair = True
+            objects.append(object)
+            cls.highest_identifier = max(cls.highest_identifier, identifier)
+            
+    @classmethod
+    def remove_from_index(cls, object):
+        objects = cls.identifier_index.get(object.mocam.identifier, [])
+        if object in objects:
+            objects.remove(object)
+    
+    
+class TargetList:
+    def __init__(self, target_items, target_cache):
+        self.target_items = target_items
+        self.target_cache = target_cache
+        self.targets = [target for target in self.get_all_targets() if target.object]
+        self.targets_by_object = {}
+        for target in self.targets:
+            self.targets_by_object.setdefault(target.object.as_pointer(), []).append(target)
+        
+    def get_all_targets(self):
+        targets = []
+        for item in self.target_items:
+            targets.append(Target(item, self.target_cache.get_state(item)))
+        targets.sort(key = attrgetter("index"))
+        return targets   
+    
+    def contains_object(self, object):
+        return object.as_pointer() in self.targets_by_object
+    
+    def find_targets_with_objects(self, objects):
+        found_targets = []
+        for object in objects:
+            found_targets.extend(self.find_targets_with_object(object))
+        return found_targets
+    
+    def find_targets_with_object(self, object):
+        return list(self.targets_by_object.get(object.as_pointer(), []))
+    
+    def __getitem__(self, key):
+        return self.targets[key]
+    
+    def __len__(self):
+        return len(self.targets)
+    
+    
+class Target:
+    def __init__(self, target_item, state = None):
+        if state is None:
+            state = TargetState(ObjectFinder.get_object(target_item))
+        self.state = state
+        self.object = state.object
+        self.index = target_item.index
+        
+    @property
+    def position_matrix(self):
+        return self.state.position_matrix
+    
+    @property
+    def state_key(self):
+        return self.state.key
+    
+    
+# changes whenever the transformation or geometry of the object changes
+target_state_versions = itertools.count()
+    
+class TargetState:
+    # an animated lens creates a new framing key on every frame
+    max_framing_amount = 16
+    
+    def __init__(self, object):
+        self.object = object
+        self.invalidate()
+        
+    def invalidate(self):
+        self.position = None
+        # framing key -> view distances / mocam_core.Pose
+        self.view_distances = {}
+        self.poses = {}
+        self.version = next(target_state_versions)
+        
+    @property
+    def position_matrix(self):
+        if self.position is None:
+            self.position = mocam_core.calc_position_matrix(np.array(self.object.matrix_world), np.array(self.object.bound_box))
+        return self.position
+    
+    def get_view_matrix(self, framing):
+        return mocam_core.calc_view_matrix(self.get_view_distances(framing)[0])
+    
+    # (distance for the view matrix, distance in world space)
+    def get_view_distances(self, framing):
+        key = get_framing_key(framing)
+        if key not in self.view_distances:
+            if len(self.view_distances) >= self.max_framing_amount:
+                self.view_distances = {}
+            if framing is None:
+                distances = (mocam_core.default_view_distance, mocam_core.default_view_distance)
+            else:
+                distances = mocam_core.calc_framing_distances(
+                    np.array(self.object.matrix_world), np.array(self.object.bound_box), framing)
+            self.view_distances[key] = distances
+        return self.view_distances[key]
+    
+    def get_pose(self, framing):
+        key = get_framing_key(framing)
+        if key not in self.poses:
+            if len(self.poses) >= self.max_framing_amount:
+                self.poses = {}
+            view_distance, focus_distance = self.get_view_distances(framing)
+            self.poses[key] = mocam_core.Pose(self.position_matrix, mocam_core.calc_view_matrix(view_distance), focus_distance)
+        return self.poses[key]
+    
+    @property
+    def key(self):
+        if self.object:
+            return self.version
+        
+        
+# keeps the resolved object and its position matrix per target identifier,
+# until the ObjectFinder index changes or the object is updated.
+# One cache is shared by all cameras, see shared_target_cache
+class TargetCache:
+    max_segment_amount = 1000
+    
+    def __init__(self):
+        self.states = {}
+        self.segments = {}
+        self.generation = ObjectFinder.generation
+        
+    def get_state(self, item):
+        self.ensure_valid_objects()
+        identifier = item.identifier
+        state = self.states.get(identifier)
+        Profiler.count_cache("TargetCache", state is not None)
+        if state is None:
+            state = TargetState(ObjectFinder.get_object(item))
+            if state.object:
+                self.states[identifier] = state
+        return state
+    
+    # segments are stored by the versions of both states, so an
+    # invalidated state can never get an outdated segment
+    def get_segment(self, start_state, end_state, framing):
+        key = (start_state.version, end_state.version, get_framing_key(framing))
+        segment = self.segments.get(key)
+        Profiler.count_cache("TargetCache.segments", segment is not None)
+        if segment is None:
+            if len(self.segments) >= self.max_segment_amount:
+                self.segments = {}
+            segment = mocam_core.Segment(start_state.get_pose(framing), end_state.get_pose(framing))
+            self.segments[key] = segment
+        return segment
+    
+    def invalidate_updated_objects(self):
+        self.ensure_valid_objects()
+        invalidated = False
+        for state in self.states.values():
+            if state.object.is_updated or state.object.is_updated_data:
+                state.invalidate()
+                invalidated = True
+        return invalidated
+                
+    def ensure_valid_objects(self):
+        if self.generation != ObjectFinder.generation:
+            self.clear()
+            
+    def clear(self):
+        self.states = {}
+        self.segments = {}
+        self.generation = ObjectFinder.generation
+
+           
+           
+shared_target_cache = TargetCache()
+           
+def get_framing_key(framing):
+    return None if framing is None else framing.key
+    
+# reads one property of all items with a single foreach_get call
+def read_property_array(collection, attribute, dtype):
+    array = np.empty(len(collection), dtype = dtype)
+    collection.foreach_get(attribute, array)
+    return array
+
+def matrices_are_close(matrix_a, matrix_b, epsilon):
+    for row_a, row_b in zip(matrix_a, matrix_b):
+        for a, b in zip(row_a, row_b):
+            if abs(a - b) > epsilon:
+                return False
+    return True
+
+def set_if_different(owner, attribute, value):
+    if getattr(owner, attribute) != value:
+        setattr(owner, attribute, value)
+     
+     
+# operators     
+        
+class NewActiveCamera(bpy.types.Operator):
+    bl_idname = "mocam.new_active_camera"
+    bl_label = "New Mocam"
+    bl_description = ""
+    bl_options = {"REGISTER"}
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT"
+    
+    def execute(self, context):
+        bpy.ops.object.camera_add()
+        mocam = Mocam(context.active_object)
+        mocam.active = True
+        return {"FINISHED"}
+                
+                
+class AddSelectedObjectsAsTargets(bpy.types.Operator):
+    bl_idname = "mocam.add_targets"
+    bl_label = "Add Targets"
+    bl_description = "Use selected objects as targets"
+    bl_options = {"REGISTER"}
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT"
+    
+    def execute(self, context):
+        mocam = get_selected_mocam()
+        if mocam:
+            mocam.add_targets(reversed(context.selected_objects))
+        return {"FINISHED"}
+    
+    
+class RemoveSelectedTargets(bpy.types.Operator):
+    bl_idname = "mocam.remove_selected_targets"
+    bl_label = "Remove Selected Targets"
+    bl_description = "Remove all targets whose objects are selected"
+    bl_options = {"REGISTER"}
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT"
+    
+    def execute(self, context):
+        mocam = get_selected_mocam()
+        if mocam:
+            targets = mocam.get_targets().find_targets_with_objects(context.selected_objects)
+            mocam.remove_targets([target.index for target in targets])
+        return {"FINISHED"}
+    
+    
+class SortTargets(bpy.types.Operator):
+    bl_idname = "mocam.sort_targets"
+    bl_label = "Sort Targets"
+    bl_description = "Change the order of all targets"
+    bl_options = {"REGISTER"}
+    
+    mode = EnumProperty(name = "Mode", default = "NAME", items = [
+        ("NAME", "Name", "Sort the targets by object name"),
+        ("REVERSE", "Reverse", "Reverse the order of the targets")])
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT"
+    
+    def execute(self, context):
+        mocam = get_selected_mocam()
+        if mocam:
+            mocam.correct_target_list()
+            targets = list(mocam.get_targets())
+            if self.mode == "NAME":
+                targets.sort(key = lambda target: target.object.name)
+            else:
+                targets.reverse()
+            mocam.reorder_targets([target.index for target in targets])
+        return {"FINISHED"}
+    
+    
+class SelectAndGotoIndex(bpy.types.Operator):
+    bl_idname = "mocam.select_and_goto_index"
+    bl_label = "Select and Goto Index"
+    bl_description = "Jump to this target (ctrl/shift to select all/more)"
+    bl_options = {"REGISTER"}
+    
+    index = IntProperty(name = "Index", default = 0)
+    
+    @classmethod
+    def poll(cls, context):
+        return True
+    
+    def invoke(self, context, event):
+        mocam = get_selected_mocam()
+        if mocam:
+            if not event.shift:
+                bpy.ops.object.select_all(action = "DESELECT")
+            
+            target = mocam.get_target_from_index(self.index)
+            if target:
+                self.select_target(target)
+                self.jump_to_target(target, mocam)
+                
+            if event.ctrl:
+                for target in mocam.get_targets():
+                    self.select_target(target)
+                   
+        return {"FINISHED"}
+    
+    def select_target(self, target):
+        target.object.select = True
+        bpy.context.scene.objects.active = target.object
+        
+    def jump_to_target(self, target, mocam):
+        frame = mocam.get_start_frame_of_index(target.index)
+        bpy.context.scene.frame_current = frame
+            
+            
+class RemoveTarget(bpy.types.Operator):
+    bl_idname = "mocam.remove_target"
+    bl_label = "Remove Target"
+    bl_description = "Remove this target"
+    bl_options = {"REGISTER"}
+    
+    index = IntProperty(name = "Index", default = 0)
+    
+    @classmethod
+    def poll(cls, context):
+        return True
+    
+    def execute(self, context):
+        mocam = get_selected_mocam()
+        if mocam:
+            mocam.remove_target_with_index(self.index)
+        return {"FINISHED"} 
+    
+    
+class ObjectNameToText(bpy.types.Operator):
+    bl_idname = "mocam.object_name_to_text"
+    bl_label = "Object Name to Text"
+    bl_description = "Use the name as text (hold ctrl/alt/shift for all text objects)"
+    bl_options = {"REGISTER"}
+    
+    index = IntProperty(name = "Index", default = 0)
+    
+    @classmethod
+    def poll(cls, context):
+        return True
+    
+    def invoke(self, context, event):
+        mocam = get_selected_mocam()
+        if mocam:
+            objects = []
+            
+            if event.ctrl or event.alt or event.shift:
+                objects = [target.object for target in mocam.get_targets()]
+            else:
+                target = mocam.get_target_from_index(self.index)
+                if target:
+                    objects = [target.object]
+            
+            for object in objects:
+                if object.type == "FONT":
+                    object.data.body = object.name
+        return {"FINISHED"}      
+    
+    
+class ObjectNameToText(bpy.types.Operator):
+    bl_idname = "mocam.object_text_to_name"
+    bl_label = "Text to Object Name"
+    bl_description = "Use the text as name (hold ctrl/alt/shift for all text objects)"
+    bl_options = {"REGISTER"}
+    
+    index = IntProperty(name = "Index", default = 0)
+    
+    @classmethod
+    def poll(cls, context):
+        return True
+    
+    def invoke(self, context, event):
+        mocam = get_selected_mocam()
+        if mocam:
+            objects = []
+            
+            if event.ctrl or event.alt or event.shift:
+                objects = [target.object for target in mocam.get_targets()]
+            else:
+                target = mocam.get_target_from_index(self.index)
+                if target:
+                    objects = [target.object]
+            
+            for object in objects:
+                if object.type == "FONT":
+                    object.name = object.data.body
+        return {"FINISHED"}     
+    
+    
+class MoveTarget(bpy.types.Operator):
+    bl_idname = "mocam.move_target"
+    bl_label = "Move Target"
+    bl_description = "Move this Target"
+    bl_options = {"REGISTER"}
+    
+    index_from = IntProperty(name = "Index From", default = 0)
+    index_to = IntProperty(name = "Index To", default = 0)
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT"
+    
+    def execute(self, context):
+        mocam = get_selected_mocam()
+        if mocam:
+            mocam.change_indices(self.index_from, self.index_to)
+        return {"FINISHED"}
+                     
+                     
+class SeparateTextAndAddTargets(bpy.types.Operator):
+    bl_idname = "mocam.separate_text_and_add_targets"
+    bl_label = "Separate Text and Add Targets"
+    bl_description = ""
+    bl_options = {"REGISTER"}
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT" and getattr(context.active_object, "type", "") == "FONT"
+    
+    def execute(self, context):
+        bpy.ops.mocam.separate_text_lines(add_as_targets = True)
+        return {"FINISHED"}
+                             
+                     
+                        
+class SeparateTextLines(bpy.types.Operator):
+    bl_idname = "mocam.separate_text_lines"
+    bl_label = "Separate Text Lines"
+    bl_description = "Create a text object for each line in the active object"
+    bl_options = {"REGISTER"}
+    
+    skip_empty_lines = BoolProperty(name = "Skip Empty Lines", default = False, description = "Don't create objects for lines without text")
+    add_as_targets = BoolProperty(name = "Add as Targets", default = False, description = "Use the new text objects as targets")
+    lines_per_camera = IntProperty(name = "Lines per Camera", default = 0, min = 0, description = "Distribute the targets on several new cameras (0 to use only the selected one)")
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT" and getattr(context.active_object, "type", "") == "FONT"
+    
+    @Profiler.measure("SeparateTextLines")
+    def execute(self, context):
+        bpy.ops.object.select_all(action = "DESELECT")
+        object = context.active_object
+        lines = object.data.body.split("\n")
+        if len(lines) > 1:
+            text_objects = self.create_line_objects(object.data, lines)
+            # only blank lines and all of them skipped, keep the source object
+            if len(text_objects) == 0:
+                object.select = True
+                return {"CANCELLED"}
+            scene = context.scene
+            for text_object in text_objects:
+                scene.objects.link(text_object)
+                text_object.select = True
+            scene.objects.unlink(object)
+            if self.add_as_targets:
+                self.add_targets(scene, text_objects)
+        return {"FINISHED"}
+    
+    def create_line_objects(self, source_data, lines):
+        text_objects = []
+        for i, line in enumerate(lines):
+            if self.skip_empty_lines and line.strip() == "":
+                continue
+            # a new curve only gets the settings, copying would duplicate the whole body
+            text_data = bpy.data.curves.new(name = line, type = "FONT")
+            copy_text_settings(source_data, text_data)
+            text_data.body = line
+            text_object = bpy.data.objects.new(name = line, object_data = text_data)
+            text_object.location = [0, -i, 0]
+            text_objects.append(text_object)
+        return text_objects
+    
+    def add_targets(self, scene, objects):
+        if len(objects) == 0:
+            return
+        chunk_size = self.lines_per_camera or len(objects)
+        mocam = get_selected_mocam()
+        for i, start in enumerate(range(0, len(objects), chunk_size)):
+            if mocam is None or i > 0:
+                mocam = new_mocam(scene)
+            mocam.add_targets(objects[start:start + chunk_size])
+            
+            
+TEXT_SETTING_NAMES = ("font", "font_bold", "font_italic", "font_bold_italic", "size", "shear",
+    "space_character", "space_word", "space_line", "offset_x", "offset_y", "align",
+    "extrude", "bevel_depth", "bevel_resolution", "resolution_u")
+    
+def copy_text_settings(source, target):
+    for name in TEXT_SETTING_NAMES:
+        setattr(target, name, getattr(source, name))
+    for material in source.materials:
+        target.materials.append(material)
+        
+def new_mocam(scene, name = "Mocam"):
+    camera = bpy.data.objects.new(name, bpy.data.cameras.new(name))
+    scene.objects.link(camera)
+    mocam = Mocam(camera)
+    mocam.active = True
+    return mocam
+    
+    
+class BakeMocam(bpy.types.Operator):
+    bl_idname = "mocam.bake"
+    bl_label = "Bake Mocam"
+    bl_description = "Write the camera animation into keyframes and deactivate the live update"
+    bl_options = {"REGISTER"}
+    
+    frame_start = IntProperty(name = "Start Frame", default = 1)
+    frame_end = IntProperty(name = "End Frame", default = 250)
+    subframe_step = FloatProperty(name = "Subframe Step", default = 1.0, min = 0.01, max = 1.0, description = "Distance between two baked keyframes in frames")
+    use_modal = BoolProperty(name = "Bake in Steps", default = False, description = "Bake a few frames at a time so that Blender can be used meanwhile (ESC to cancel)")
+    frames_per_step = IntProperty(name = "Frames per Step", default = 250, min = 1, description = "Amount of frames that are calculated between two redraws")
+    write_per_step = BoolProperty(name = "Write Keyframes per Step", default = False, description = "Update the keyframes after every step instead of only at the end")
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT"
+    
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return context.window_manager.invoke_props_dialog(self)
+    
+    def execute(self, context):
+        mocam = get_selected_mocam()
+        if not mocam:
+            return {"FINISHED"}
+        frames = get_bake_frames(self.frame_start, self.frame_end, self.subframe_step)
+        if not self.use_modal or context.window is None:
+            MocamBaker(mocam).bake(frames)
+            return {"FINISHED"}
+        
+        self.baker = MocamBaker(mocam)
+        self.baker.prepare()
+        self.chunks = iterate_path(mocam, frames, self.frames_per_step)
+        self.frame_amount = len(frames)
+        
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(0.01, context.window)
+        window_manager.modal_handler_add(self)
+        window_manager.progress_begin(0, max(self.frame_amount, 1))
+        return {"RUNNING_MODAL"}
+    
+    def modal(self, context, event):
+        if event.type == "ESC":
+            self.cancel(context)
+            return {"CANCELLED"}
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+        
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.baker.write_keyframes()
+            self.baker.finish()
+            self.stop(context)
+            return {"FINISHED"}
+        
+        frames, matrices, focus_distances, target_indices = chunk
+        self.baker.add_frames(frames.tolist(), matrices, focus_distances)
+        if self.write_per_step:
+            self.baker.write_keyframes()
+        self.show_progress(context, len(self.baker.frames))
+        return {"RUNNING_MODAL"}
+    
+    def show_progress(self, context, done_amount):
+        context.window_manager.progress_update(done_amount)
+        if context.area:
+            context.area.header_text_set("Mocam Bake: {} / {} frames (ESC to cancel)".format(done_amount, self.frame_amount))
+    
+    def cancel(self, context):
+        # keyframes that were written per step are kept
+        self.stop(context)
+        
+    def stop(self, context):
+        # sets the scene back to its frame when the path is animated
+        self.chunks.close()
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+        if context.area:
+            context.area.header_text_set()
+    
+                               
+                        
+    
+class ExportCameraPath(bpy.types.Operator):
+    bl_idname = "mocam.export_path"
+    bl_label = "Export Camera Path"
+    bl_description = "Write the camera path of every frame into a file"
+    bl_options = {"REGISTER"}
+    
+    filepath = StringProperty(name = "File Path", subtype = "FILE_PATH")
+    file_format = EnumProperty(name = "Format", default = "BINARY", items = [
+        ("BINARY", "Binary", "Fixed size records that can be memory-mapped"),
+        ("CSV", "CSV", ""),
+        ("JSONL", "JSON Lines", "")])
+    frame_start = IntProperty(name = "Start Frame", default = 1)
+    frame_end = IntProperty(name = "End Frame", default = 250)
+    subframe_step = FloatProperty(name = "Subframe Step", default = 1.0, min = 0.01, max = 1.0, description = "Distance between two exported frames")
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT"
+    
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+    
+    def execute(self, context):
+        mocam = get_selected_mocam()
+        if mocam:
+            frames = get_bake_frames(self.frame_start, self.frame_end, self.subframe_step)
+            amount = export_camera_path(mocam, bpy.path.abspath(self.filepath), frames, self.file_format)
+            self.report({"INFO"}, "Exported {} frames".format(amount))
+        return {"FINISHED"}
+    
+    
+class DumpProfile(bpy.types.Operator):
+    bl_idname = "mocam.dump_profile"
+    bl_label = "Dump Profile"
+    bl_description = "Write the profiling counters into a JSON or CSV file"
+    bl_options = {"REGISTER"}
+    
+    filepath = StringProperty(name = "File Path", subtype = "FILE_PATH")
+    file_format = EnumProperty(name = "Format", default = "JSON", items = [
+        ("JSON", "JSON", ""),
+        ("CSV", "CSV", "")])
+    
+    @classmethod
+    def poll(cls, context):
+        return True
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+    
+    def execute(self, context):
+        if self.file_format == "JSON":
+            Profiler.dump_json(bpy.path.ensure_ext(self.filepath, ".json"))
+        else:
+            Profiler.dump_csv(bpy.path.ensure_ext(self.filepath, ".csv"))
+        return {"FINISHED"}
+    
+    
+class ResetProfile(bpy.types.Operator):
+    bl_idname = "mocam.reset_profile"
+    bl_label = "Reset Profile"
+    bl_description = "Reset all profiling counters"
+    bl_options = {"REGISTER"}
+    
+    @classmethod
+    def poll(cls, context):
+        return True
+    
+    def execute(self, context):
+        Profiler.reset()
+        return {"FINISHED"}
+    
+                               
+# properties    
+
+def mocam_data_changed(self, context):
+    self.id_data.mocam.revision += 1
+
+class ObjectFinderProperties(bpy.types.PropertyGroup):
+    object_name = StringProperty(name = "Object Name", default = "")
+    identifier = IntProperty(name = "Identifier", default = 0)
+        
+class TargetProperties(bpy.types.PropertyGroup):
+    identifier = IntProperty(name = "Identifier", default = 0)
+    object_name = StringProperty(name = "Object Name", default = "")
+    # only read to migrate files of older versions, see Mocam.migrate_target_items
+    object = PointerProperty(name = "Object", type = ObjectFinderProperties)
+    index = IntProperty(name = "Index", default = 0, update = mocam_data_changed)
+    
+class MoveProperties(bpy.types.PropertyGroup):
+    load = FloatProperty(name = "Load Time", default = 15.0, description = "Time to move from last to this target in frames", min = 0, update = mocam_data_changed)
+    stay = FloatProperty(name = "Stay Time", default = 10.0, description = "Time to stay at this targets in frames", min = 0, update = mocam_data_changed)
+    
+class MocamProperties(bpy.types.PropertyGroup):
+    active = BoolProperty(name = "Active", default = False)
+    use_auto_framing = BoolProperty(name = "Auto Framing", default = False, description = "Choose the distance to every target so that it fills the camera view", update = mocam_data_changed)
+    framing_margin = FloatProperty(name = "Margin", default = 0.1, min = 0, description = "Space around the framed targets relative to their size", update = mocam_data_changed)
+    use_auto_focus = BoolProperty(name = "Auto Focus", default = False, description = "Focus on the surface of the targets in front of the camera", update = mocam_data_changed)
+    revision = IntProperty(name = "Revision", default = 0, description = "Incremented whenever the targets or moves change")
+    targets = CollectionProperty(name = "Targets", type = TargetProperties)
+    moves = CollectionProperty(name = "Moves", type = MoveProperties)
+    
+class MocamObjectProperties(bpy.types.PropertyGroup):
+    identifier = IntProperty(name = "Identifier", default = 0)   
+        
+def get_camera_name_items(self, context):
+    camera_names = get_camera_names()
+    items = []
+    for name in camera_names:
+        items.append((name, name, ""))
+    return items
+
+class InterpolationProperties(bpy.types.PropertyGroup):
+    animation = FloatProperty(name = "Animation", default = 0.0)
+    
+def enable_profiling_changed(self, context):
+    Profiler.enabled = self.enable_profiling
+
+class MocamSceneProperties(bpy.types.PropertyGroup):
+    selected_camera_name = EnumProperty(name = "Camera Name", items = get_camera_name_items)   
+    next_identifier = IntProperty(name = "Next Identifier", default = 1, min = 1, description = "Identifier the next new target object gets")
+    use_path_cache = BoolProperty(name = "Use Path Cache", default = False, description = "Keep baked camera paths in a mocam_cache folder next to the .blend file")
+    path_cache_size = IntProperty(name = "Path Cache Size", default = 256, min = 1, description = "Maximum size of the path cache in MB")
+    use_render_table = BoolProperty(name = "Precalculate Render", default = True, description = "Calculate the camera for all motion blur samples of a frame before it is rendered")
+    evaluation_scope = EnumProperty(name = "Evaluation Scope", default = "ALL", description = "Active Mocams that are updated while working", items = [
+        ("SCENE", "Scene Camera", "Only update the scene camera"),
+        ("VIEWS", "Used Cameras", "Update the scene camera and the cameras 3D views look through"),
+        ("ALL", "All Cameras", "Update every active Mocam")])
+    enable_renaming = BoolProperty(name = "Enable Renaming", default = False, description = "Enable renaming mode for all targets")
+    interpolations = CollectionProperty(name = "Interpolations", type = InterpolationProperties)
+    target_page = IntProperty(name = "Page", default = 1, min = 1, description = "Page of the target list that is displayed")
+    targets_per_page = IntProperty(name = "Targets per Page", default = 50, min = 1, description = "Maximum amount of targets displayed at once")
+    show_profiling = BoolProperty(name = "Show Profiling", default = False)
+    enable_profiling = BoolProperty(name = "Enable Profiling", default = False, description = "Measure the time spent in Mocam", update = enable_profiling_changed)
+        
+        
+        
+        
+# panel
+
+class PanelViewModel:
+    '''
+    The part of a Mocam the panel displays. It is rebuilt when the targets
+    or the set of objects changed, not on every redraw.
+    '''
+    def __init__(self, mocam, key):
+        self.key = key
+        self.targets = mocam.get_targets()
+        
+    def find_selected_targets(self, objects):
+        selected_targets = self.targets.find_targets_with_objects(objects)
+        selected_targets.sort(key = attrgetter("index"))
+        return selected_targets
+    
+    def get_page(self, page, targets_per_page):
+        page_amount = max(int(math.ceil(len(self.targets) / targets_per_page)), 1)
+        page = min(max(page, 1), page_amount)
+        start = (page - 1) * targets_per_page
+        return page, page_amount, self.targets[start:start + targets_per_page]
+        
+def get_panel_view_model(mocam):
+    pointer = mocam.camera.data.as_pointer()
+    key = (mocam.props.revision, ObjectFinder.generation)
+    view_model = panel_view_models.get(pointer)
+    is_up_to_date = view_model is not None and view_model.key == key
+    Profiler.count_cache("PanelViewModel", is_up_to_date)
+    if not is_up_to_date:
+        view_model = PanelViewModel(mocam, key)
+        panel_view_models[pointer] = view_model
+    return view_model
+    
+
+class MocamPanel(bpy.types.Panel):
+    bl_idname = "MocamPanel"
+    bl_label = "Mocam"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "TOOLS"
+    bl_category = "Tools"
+    
+    @Profiler.measure("MocamPanel.draw")
+    def draw(self, context):
+        self.draw_mocam(self.layout, context)
+        self.draw_profiling(self.layout, context)
+        
+    def draw_mocam(self, layout, context):
+        scene = context.scene
+        
+        cameras = get_cameras()
+        camera_amount = len(cameras)
+        
+        if camera_amount == 0:
+            layout.operator("mocam.new_active_camera", "New Mocam")
+        elif camera_amount >= 2:
+            layout.prop(scene.mocam, "selected_camera_name", text = "Display")
+            layout.prop(scene.mocam, "evaluation_scope", text = "Update")
+        
+        mocam = get_selected_mocam()    
+        if not mocam:
+            return
+        
+        layout.prop(mocam.properties, "active", text = "Is Camera Active")
+        
+        if not mocam.active:
+            return
+        
+        row = layout.row(align = True)
+        row.prop(mocam.properties, "use_auto_framing")
+        if mocam.properties.use_auto_framing:
+            row.prop(mocam.properties, "framing_margin")
+        layout.prop(mocam.properties, "use_auto_focus")
+        
+        view_model = get_panel_view_model(mocam)
+        targets = view_model.targets
+        page, page_amount, page_targets = view_model.get_page(scene.mocam.target_page, scene.mocam.targets_per_page)
+        
+        col = layout.column(align = True)
+        if page_amount > 1:
+            row = col.row(align = True)
+            row.prop(scene.mocam, "target_page", text = "Page {} / {}".format(page, page_amount))
+            row.prop(scene.mocam, "targets_per_page", text = "Size")
+        for target in page_targets:
+            row = col.row(align = True)
+            if scene.mocam.enable_renaming:
+                operator = row.operator("mocam.select_and_goto_index", text = "", icon = "EYEDROPPER")
+                operator.index = target.index
+                row.prop(target.object, "name", text = "")
+                if target.object.type == "FONT":
+                    operator = row.operator("mocam.object_name_to_text", text = "", icon = "OUTLINER_DATA_FONT")
+                    operator.index = target.index
+                    operator = row.operator("mocam.object_text_to_name", text = "", icon = "OUTLINER_OB_FONT")
+                    operator.index = target.index
+            else:
+                operator = row.operator("mocam.move_target", text = "", icon = "TRIA_UP")
+                operator.index_from = target.index
+                operator.index_to = max(target.index - 1, 0)
+                
+                operator = row.operator("mocam.move_target", text = "", icon = "TRIA_DOWN")
+                operator.index_from = target.index
+                operator.index_to = min(target.index + 1, len(targets) - 1)
+                    
+                operator = row.operator("mocam.select_and_goto_index", text = target.object.name)
+                operator.index = target.index
+                    
+                operator = row.operator("mocam.remove_target", text = "", icon = "X")
+                operator.index = target.index
+        
+        row = col.row(align = True)
+        row.operator("mocam.add_targets", text = "From Selection", icon = "PLUS")
+        row.operator("mocam.remove_selected_targets", text = "", icon = "X")
+        
+        try:
+            if "\n" in context.active_object.data.body:
+                row = col.row(align = True)
+                row.operator("mocam.separate_text_and_add_targets", text = "From Text Lines", icon = "PLUS")
+        except: pass
+            
+        layout.prop(scene.mocam, "enable_renaming")
+        row = layout.row(align = True)
+        row.operator("mocam.bake", text = "Bake", icon = "REC")
+        row.operator("mocam.export_path", text = "Export", icon = "EXPORT")
+        row.prop(scene.mocam, "use_path_cache", text = "", icon = "FILE_CACHE")
+        
+        move_items = mocam.props.moves
+        for target in view_model.find_selected_targets(context.selected_objects):
+            box = layout.box()
+            col = box.column(align = True)
+            col.label("\"" + target.object.name + "\"")
+            # add_targets and correct_target_list create the move items, the panel must
+            # not write them, but a file of an older version can still lack them
+            if target.index >= len(move_items):
+                continue
+            move_item = move_items[target.index]
+            if target.index > 0:
+                col.prop(move_item, "load")
+            if target.index < len(targets) - 1:
+                col.prop(move_item, "stay")
+                
+    def draw_profiling(self, layout, context):
+        settings = context.scene.mocam
+        box = layout.box()
+        icon = "TRIA_DOWN" if settings.show_profiling else "TRIA_RIGHT"
+        box.prop(settings, "show_profiling", text = "Profiling", icon = icon, emboss = False)
+        if not settings.show_profiling:
+            return
+        
+        box.prop(settings, "enable_profiling")
+        col = box.column(align = True)
+        for name, counter in sorted(Profiler.counters.items()):
+            if counter.calls > 0:
+                col.label("{}: {} calls, {:.2f} ms total, {:.3f} ms max".format(
+                    name, counter.calls, counter.total_time * 1000, counter.max_time * 1000))
+            if counter.cache_hits + counter.cache_misses > 0:
+                col.label("{}: {:.1%} cache hits of {}".format(
+                    name, counter.hit_rate, counter.cache_hits + counter.cache_misses))
+        row = box.row(align = True)
+        row.operator("mocam.dump_profile", text = "Dump", icon = "FILE_TEXT")
+        row.operator("mocam.reset_profile", text = "Reset", icon = "FILE_REFRESH")
+        
+        
+# command line
+#
+#   blender -b --python Mocam/command_line.py -- bake first.blend second.blend --jobs 4 --report report.json
+#
+# Every file is baked by a separate background Blender process,
+# the main process only collects the results and writes the report.
+
+BAKE_RESULT_PREFIX = "MOCAM_BAKE_RESULT "
+command_line_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "command_line.py")
+
+def get_script_arguments():
+    if "--" in sys.argv:
+        return sys.argv[sys.argv.index("--") + 1:]
+    return []
+
+def run_command_line(arguments):
+    if len(arguments) == 0:
+        return
+    
+    parser = argparse.ArgumentParser(prog = "blender -b --python Mocam/command_line.py --")
+    subparsers = parser.add_subparsers(dest = "command")
+    
+    bake_parser = subparsers.add_parser("bake", help = "Bake all active Mocams in the given .blend files")
+    bake_parser.add_argument("files", nargs = "+", help = ".blend files to bake")
+    bake_parser.add_argument("--jobs", type = int, default = os.cpu_count() or 1, help = "Amount of Blender processes running at the same time")
+    bake_parser.add_argument("--subframe-step", type = float, default = 1.0, help = "Distance between two baked keyframes in frames")
+    bake_parser.add_argument("--report", default = "", help = "Write the JSON report into this file instead of printing it")
+    
+    worker_parser = subparsers.add_parser("bake-file", help = "Bake the currently opened file (used by the bake command)")
+    worker_parser.add_argument("--subframe-step", type = float, default = 1.0)
+    
+    args = parser.parse_args(arguments)
+    if args.command == "bake":
+        run_bake_command(args)
+    elif args.command == "bake-file":
+        run_bake_file_command(args)
+        
+def run_bake_command(args):
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = max(args.jobs, 1)) as executor:
+        file_reports = list(executor.map(lambda path: bake_file_in_subprocess(path, args.subframe_step), args.files))
+    
+    failures = [report for report in file_reports if not report["success"]]
+    report = {
+        "files": file_reports,
+        "failures": len(failures),
+        "duration": time.perf_counter() - start_time }
+    text = json.dumps(report, indent = 2)
+    
+    if args.report:
+        with open(args.report, "w") as file:
+            file.write(text)
+    else:
+        print(text)
+    if len(failures) > 0:
+        sys.exit(1)
+        
+def bake_file_in_subprocess(filepath, subframe_step):
+    report = {"file": filepath, "success": False, "cameras": [], "duration": 0.0}
+    if not os.path.isfile(filepath):
+        report["error"] = "File not found"
+        return report
+    
+    command = [bpy.app.binary_path, "--background", "--factory-startup", filepath,
+               "--python", command_line_script,
+               "--", "bake-file", "--subframe-step", str(subframe_step)]
+    start_time = time.perf_counter()
+    process = subprocess.Popen(command, stdout = subprocess.PIPE, stderr = subprocess.PIPE, universal_newlines = True)
+    stdout, stderr = process.communicate()
+    report["duration"] = time.perf_counter() - start_time
+    
+    results = [line[len(BAKE_RESULT_PREFIX):] for line in stdout.splitlines() if line.startswith(BAKE_RESULT_PREFIX)]
+    if len(results) > 0:
+        report.update(json.loads(results[-1]))
+    else:
+        report["error"] = "Blender exited with code {} without a result:\n{}".format(process.returncode, stderr[-2000:])
+    return report
+    
+def run_bake_file_command(args):
+    result = {"cameras": []}
+    try:
+        scene = bpy.context.scene
+        frames = get_bake_frames(scene.frame_start, scene.frame_end, args.subframe_step)
+        for mocam in get_active_mocams():
+            MocamBaker(mocam).bake(frames)
+            result["cameras"].append(mocam.camera.name)
+        bpy.ops.wm.save_mainfile()
+        result["success"] = True
+    except:
+        result["success"] = False
+        result["error"] = traceback.format_exc()
+    print(BAKE_RESULT_PREFIX + json.dumps(result))
+    sys.stdout.flush()
+        
+        
+def register():
+    bpy.utils.register_module(__name__)
+    
+    bpy.types.Camera.mocam = PointerProperty(name = "Mocam", type = MocamProperties)
+    bpy.types.Object.mocam = PointerProperty(name = "Mocam", type = MocamObjectProperties)
+    bpy.types.Scene.mocam = PointerProperty(name = "Mocam", type = MocamSceneProperties)
+    
+    for handlers, function in get_handler_functions():
+        if function not in handlers:
+            handlers.append(function)
+
+def unregister():
+    for handlers, function in get_handler_functions():
+        if function in handlers:
+            handlers.remove(function)
+            
+    bpy.utils.unregister_module(__name__)
+    
+def get_handler_functions():
+    handlers = bpy.app.handlers
+    return [(handlers.frame_change_post, mocam_frame_changed),
+            (handlers.scene_update_post, mocam_scene_updated),
+            (handlers.load_post, invalidate_caches),
+            (handlers.load_post, repair_identifiers_after_load),
+            (handlers.undo_post, invalidate_caches),
+            (handlers.redo_post, invalidate_caches),
+            (handlers.load_post, load_profiler_settings),
+            (handlers.render_pre, build_render_table),
+            (handlers.render_complete, clear_render_table),
+            (handlers.render_cancel, clear_render_table)]
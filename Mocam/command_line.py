@@ -0,0 +1,21 @@
+'''
+Command line of Mocam, see run_command_line in __init__.py:
+
+    blender -b --python Mocam/command_line.py -- bake first.blend second.blend --jobs 4 --report report.json
+
+Blender runs this file as a plain script, so the package is imported
+from the directory that contains it.
+'''
+
+import os
+import sys
+import importlib
+
+package_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(package_directory)
+if parent_directory not in sys.path:
+    sys.path.append(parent_directory)
+mocam = importlib.import_module(os.path.basename(package_directory))
+
+mocam.register()
+mocam.run_command_line(mocam.get_script_arguments())
@@ -0,0 +1,638 @@
+'''
+Copyright (C) 2014 Jacques Lucke
+mail@jlucke.com
+
+Created by Jacques Lucke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Camera calculation of Mocam without any dependency on Blender,
+so that it can be used and benchmarked in a normal Python process.
+
+Conventions:
+    matrix - 4x4 numpy array, translation in the last column
+    index - position of a target in the move order (the 'index' of a target item)
+    pose - (position matrix, view matrix) of a target
+'''
+
+import os
+import math
+import hashlib
+import numpy as np
+from bisect import bisect_right
+from itertools import islice
+
+default_view_distance = 5
+
+
+class Timeline:
+    def __init__(self, loads, stays, target_indices):
+        self.loads = [float(load) for load in loads]
+        self.end_frames = []
+        frame_counter = 0
+        for load, stay in zip(self.loads, stays):
+            frame_counter += load + stay
+            self.end_frames.append(frame_counter)
+
+        self.target_amount = len(target_indices)
+        self.target_positions = {}
+        for position, index in enumerate(target_indices):
+            self.target_positions.setdefault(index, position)
+
+    @property
+    def move_amount(self):
+        return len(self.end_frames)
+
+    def find_move_index(self, frame):
+        index = bisect_right(self.end_frames, frame)
+        return min(index, self.move_amount - 1)
+
+    def get_start_frame(self, index):
+        if index <= 0:
+            return 0
+        return self.end_frames[index - 1]
+
+    def get_end_frame(self, index):
+        return self.end_frames[index]
+
+    def has_target(self, index):
+        return index in self.target_positions
+
+    @property
+    def last_target_index(self):
+        index = self.target_amount - 1
+        if self.has_target(index):
+            return index
+
+    def get_move_data(self, frame):
+        move_data = MoveData()
+        index = self.find_move_index(frame)
+        if index >= 0:
+            move_data.move_index = index
+            move_data.load = self.loads[index]
+            move_data.frame_in_move = frame - self.get_start_frame(index)
+            move_data.target_start = index - 1 if self.has_target(index - 1) else None
+            move_data.target_end = index if self.has_target(index) else self.last_target_index
+        return move_data
+
+    def get_move_arrays(self, frames):
+        return MoveArrays(self, frames)
+
+
+class MoveData:
+    def __init__(self):
+        self.target_start = None
+        self.target_end = None
+        self.move_index = -1
+        self.load = 0
+        self.frame_in_move = 0
+
+    @property
+    def has_no_targets(self):
+        return self.target_start is None and self.target_end is None
+
+    @property
+    def is_first_target(self):
+        return self.target_start is None and self.target_end is not None
+
+    @property
+    def is_last_target(self):
+        return self.target_start is not None and self.target_end is None
+
+    @property
+    def has_both_targets(self):
+        return self.target_start is not None and self.target_end is not None
+
+    @property
+    def is_moving(self):
+        if self.move_index >= 0:
+            return self.frame_in_move < self.load
+        return False
+
+    @property
+    def move_progress(self):
+        progress = self.frame_in_move / (self.load or 1)
+        return min(max(progress, 0), 1)
+
+    @property
+    def current_target(self):
+        if self.target_end is not None:
+            return self.target_end
+        return self.target_start
+
+
+# the same information as in MoveData but for many frames at once
+class MoveArrays:
+    def __init__(self, timeline, frames):
+        move_amount = timeline.move_amount
+        target_exists = np.array([timeline.has_target(i) for i in range(move_amount)], dtype = bool)
+        last_index = timeline.last_target_index
+
+        end_frames = np.array(timeline.end_frames)
+        start_frames = np.concatenate(([0.0], end_frames[:-1]))
+        self.move_indices = np.minimum(np.searchsorted(end_frames, frames, side = "right"), move_amount - 1)
+        self.frames_in_move = frames - start_frames[self.move_indices]
+        self.loads = np.array(timeline.loads)[self.move_indices]
+
+        self.start_indices = self.move_indices - 1
+        self.start_exists = (self.start_indices >= 0) & target_exists[np.maximum(self.start_indices, 0)]
+        end_is_move_target = target_exists[self.move_indices]
+        self.end_indices = np.where(end_is_move_target, self.move_indices, -1 if last_index is None else last_index)
+        self.end_exists = end_is_move_target | (last_index is not None)
+
+    @property
+    def has_targets(self):
+        return self.start_exists | self.end_exists
+
+    @property
+    def is_moving(self):
+        return self.start_exists & self.end_exists & (self.frames_in_move < self.loads)
+
+    @property
+    def move_progress(self):
+        progress = self.frames_in_move / np.where(self.loads == 0, 1, self.loads)
+        return np.clip(progress, 0, 1)
+
+    @property
+    def current_targets(self):
+        return np.where(self.end_exists, self.end_indices, self.start_indices)
+
+
+class TargetPoses:
+    def __init__(self, positions, views = None):
+        self.positions = positions
+        self.views = views
+        self.poses = {}
+        self.segments = {}
+
+    def get(self, index):
+        if 0 <= index < len(self.positions):
+            view = calc_view_matrix() if self.views is None else self.views[index]
+            return np.asarray(self.positions[index]), np.asarray(view)
+
+    def get_pose(self, index):
+        if index not in self.poses:
+            self.poses[index] = Pose(*self.get(index))
+        return self.poses[index]
+
+    def get_segment(self, start, end):
+        if (start, end) not in self.segments:
+            self.segments[(start, end)] = Segment(self.get_pose(start), self.get_pose(end))
+        return self.segments[(start, end)]
+
+
+class Pose:
+    '''
+    Position and view matrix of a target, decomposed once into
+    location, quaternion and scale lists for the interpolation.
+    '''
+    def __init__(self, position, view, focus_distance = default_view_distance):
+        self.focus_distance = float(focus_distance)
+        self.position = np.asarray(position, dtype = np.float64)
+        self.view = np.asarray(view, dtype = np.float64)
+        self.matrix = np.dot(self.position, self.view)
+        self.position_parts = [part[0].tolist() for part in decompose_matrices(self.position)]
+        self.view_parts = [part[0].tolist() for part in decompose_matrices(self.view)]
+
+
+class Segment:
+    '''
+    The move between two poses, evaluated with scalar math only.
+    '''
+    def __init__(self, start_pose, end_pose):
+        self.position = PartsBlend(start_pose.position_parts, end_pose.position_parts)
+        self.view = PartsBlend(start_pose.view_parts, end_pose.view_parts)
+        self.focus_a = start_pose.focus_distance
+        self.focus_b = end_pose.focus_distance
+
+    def evaluate(self, factor):
+        return multiply_matrices(self.position.evaluate(factor), self.view.evaluate(factor))
+
+    def evaluate_focus(self, factor):
+        return self.focus_a * (1 - factor) + self.focus_b * factor
+
+
+class PartsBlend:
+    # the scalar version of blend_matrices, the slerp constants are computed only once
+    def __init__(self, parts_a, parts_b):
+        self.location_a, quaternion_a, self.scale_a = parts_a
+        self.location_b, quaternion_b, self.scale_b = parts_b
+
+        cosom = sum(a * b for a, b in zip(quaternion_a, quaternion_b))
+        if cosom < 0:
+            quaternion_a = [-value for value in quaternion_a]
+            cosom = -cosom
+        self.quaternion_a = quaternion_a
+        self.quaternion_b = quaternion_b
+        self.use_slerp = (1 - cosom) > 0.0001
+        self.omega = math.acos(min(cosom, 1))
+        self.sinom = math.sin(self.omega) if self.use_slerp else 1
+
+    def evaluate(self, factor):
+        if self.use_slerp:
+            factor_1 = math.sin((1 - factor) * self.omega) / self.sinom
+            factor_2 = math.sin(factor * self.omega) / self.sinom
+        else:
+            factor_1 = 1 - factor
+            factor_2 = factor
+        return compose_matrix(
+            [a * (1 - factor) + b * factor for a, b in zip(self.location_a, self.location_b)],
+            [a * factor_1 + b * factor_2 for a, b in zip(self.quaternion_a, self.quaternion_b)],
+            [a * (1 - factor) + b * factor for a, b in zip(self.scale_a, self.scale_b)])
+
+
+class Calculator:
+    # poses has to provide get(index), get_pose(index) and get_segment(start, end),
+    # see TargetPoses
+    def __init__(self, timeline, poses):
+        self.timeline = timeline
+        self.poses = poses
+
+    def calculate(self, frame):
+        return self.calculate_move_data(self.timeline.get_move_data(frame))
+
+    def calculate_move_data(self, move_data):
+        if move_data.has_no_targets:
+            return np.identity(4), 1.0
+
+        if move_data.has_both_targets and move_data.is_moving:
+            segment = self.poses.get_segment(move_data.target_start, move_data.target_end)
+            return np.array(segment.evaluate(move_data.move_progress)), segment.evaluate_focus(move_data.move_progress)
+
+        pose = self.poses.get_pose(move_data.current_target)
+        return pose.matrix, pose.focus_distance
+
+    # same as calling calculate for every frame but all frames are interpolated at once
+    def calculate_range(self, frames, pose_table = None):
+        frames = np.asarray(frames, dtype = np.float64)
+        matrices = identity_matrices(len(frames))
+        focus_distances = np.ones(len(frames))
+        if self.timeline.move_amount == 0 or len(frames) == 0:
+            return matrices, focus_distances
+
+        moves = self.timeline.get_move_arrays(frames)
+        if pose_table is None:
+            pose_table = self.get_pose_table()
+
+        has_targets = moves.has_targets
+        current_targets = moves.current_targets[has_targets]
+        matrices[has_targets] = pose_table.matrices[current_targets]
+        focus_distances[has_targets] = pose_table.focus_distances[current_targets]
+
+        moving = moves.is_moving
+        if np.any(moving):
+            starts, ends = moves.start_indices[moving], moves.end_indices[moving]
+            factors = moves.move_progress[moving]
+            position_parts = pose_table.position_parts
+            view_parts = pose_table.view_parts
+            matrices[moving] = multiply_matrix_arrays(
+                blend_matrices(position_parts, position_parts, starts, ends, factors),
+                blend_matrices(view_parts, view_parts, starts, ends, factors))
+            focus_distances[moving] = lerp_arrays(pose_table.focus_distances[starts, np.newaxis],
+                                                  pose_table.focus_distances[ends, np.newaxis], factors)[:, 0]
+
+        return matrices, focus_distances
+
+    # calculate_range for long frame sequences, yields
+    # (frames, matrices, focus distances, active target indices) chunk by chunk
+    def iterate_range(self, frames, chunk_size = 1024):
+        pose_table = self.get_pose_table()
+        frames = iter(frames)
+        while True:
+            chunk = np.fromiter(islice(frames, chunk_size), dtype = np.float64)
+            if len(chunk) == 0:
+                return
+            matrices, focus_distances = self.calculate_range(chunk, pose_table)
+            yield chunk, matrices, focus_distances, self.get_active_targets(chunk)
+
+    # -1 for frames without a target
+    def get_active_targets(self, frames):
+        frames = np.asarray(frames, dtype = np.float64)
+        if self.timeline.move_amount == 0:
+            return np.full(len(frames), -1, dtype = np.int64)
+        moves = self.timeline.get_move_arrays(frames)
+        return np.where(moves.has_targets, moves.current_targets, -1).astype(np.int64)
+
+    # the decomposed poses of all targets as arrays, taken from the same
+    # Pose objects that are used when calculating single frames
+    def get_pose_table(self):
+        amount = self.timeline.move_amount
+        table = PoseTable(amount)
+        for index in range(amount):
+            if self.timeline.has_target(index):
+                table.set_pose(index, self.poses.get_pose(index))
+        return table
+
+    def get_pose_arrays(self):
+        amount = self.timeline.move_amount
+        positions = identity_matrices(amount)
+        views = identity_matrices(amount)
+        for index in range(amount):
+            if self.timeline.has_target(index):
+                positions[index], views[index] = self.poses.get(index)
+        return positions, views
+
+
+class PoseTable:
+    def __init__(self, amount):
+        self.matrices = identity_matrices(amount)
+        self.focus_distances = np.full(amount, float(default_view_distance))
+        self.position_parts = identity_parts(amount)
+        self.view_parts = identity_parts(amount)
+
+    def set_pose(self, index, pose):
+        self.matrices[index] = pose.matrix
+        self.focus_distances[index] = pose.focus_distance
+        for parts, pose_parts in ((self.position_parts, pose.position_parts), (self.view_parts, pose.view_parts)):
+            for array, values in zip(parts, pose_parts):
+                array[index] = values
+
+
+# changes whenever the calculation changes in a way that makes old cached paths wrong
+path_format_version = 2
+
+def calc_path_key(timeline, pose_arrays, frames):
+    '''
+    Hash of everything calculate_range depends on: the move timing, which
+    targets exist, their poses and the requested frames.
+    '''
+    positions, views = pose_arrays
+    digest = hashlib.sha1()
+    digest.update(str(path_format_version).encode())
+    digest.update(np.asarray(timeline.loads, dtype = np.float64).tobytes())
+    digest.update(np.asarray(timeline.end_frames, dtype = np.float64).tobytes())
+    digest.update(np.array([timeline.has_target(index) for index in range(timeline.move_amount)]).tobytes())
+    digest.update(np.ascontiguousarray(positions, dtype = np.float64).tobytes())
+    digest.update(np.ascontiguousarray(views, dtype = np.float64).tobytes())
+    digest.update(np.asarray(frames, dtype = np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class PathCache:
+    '''
+    Calculated camera paths as .npy files in a directory, one row per frame
+    with the 16 matrix values followed by the focus distance. Files are
+    memory-mapped when they are read. When the directory is larger than
+    size_limit bytes, the least recently used files are deleted.
+    '''
+    def __init__(self, directory, size_limit):
+        self.directory = directory
+        self.size_limit = size_limit
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def load(self, key):
+        path = self.get_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            data = np.load(path, mmap_mode = "r")
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            return None
+        if data.ndim != 2 or data.shape[1] != 17:
+            return None
+        return data[:, :16].reshape(-1, 4, 4), data[:, 16]
+
+    def store(self, key, matrices, focus_distances):
+        data = np.empty((len(matrices), 17))
+        data[:, :16] = np.reshape(matrices, (-1, 16))
+        data[:, 16] = focus_distances
+        # write to another file first so that a reader never sees half a file
+        temporary_path = self.get_path(key) + ".tmp"
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with open(temporary_path, "wb") as file:
+                np.save(file, data)
+            os.replace(temporary_path, self.get_path(key))
+        except OSError:
+            # the cache is optional, a read-only or full disk must not stop a bake
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            return False
+        self.limit_size()
+        return True
+
+    def limit_size(self):
+        files = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".npy"):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                files.append((status.st_mtime, status.st_size, path))
+        files.sort()
+        total_size = sum(size for time, size, path in files)
+        for time, size, path in files:
+            if total_size <= self.size_limit:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                # still mapped by a reader on some platforms
+                pass
+
+
+def calc_position_matrix(matrix_world, bound_box):
+    center = np.mean(np.asarray(bound_box, dtype = np.float64), axis = 0)
+    return np.dot(matrix_world, translation_matrix(center))
+
+def calc_view_matrix(distance = default_view_distance):
+    return translation_matrix((0, 0, distance))
+
+
+class Framing:
+    '''
+    Half field of view of a camera as tangents and the
+    margin that is kept around a framed target (0.1 = 10%).
+    '''
+    def __init__(self, tan_x, tan_y, margin):
+        self.tan_x = tan_x
+        self.tan_y = tan_y
+        self.margin = margin
+
+    @property
+    def key(self):
+        return (self.tan_x, self.tan_y, self.margin)
+
+# same sensor fit rules as Blender, aspect is width / height of the rendered image
+def calc_field_of_view_tangents(lens, sensor_width, sensor_height, sensor_fit, aspect):
+    if sensor_fit == "VERTICAL":
+        tan_y = sensor_height / (2 * lens)
+        return tan_y * aspect, tan_y
+    if sensor_fit == "HORIZONTAL" or aspect >= 1:
+        tan_x = sensor_width / (2 * lens)
+        return tan_x, tan_x / aspect
+    tan_y = sensor_width / (2 * lens)
+    return tan_y * aspect, tan_y
+
+def calc_framing_distances(matrix_world, bound_box, framing):
+    '''
+    Distance between the bound box center and a camera that looks along the
+    local z axis of the object and sees the whole bound box.
+    Returns (distance in the scaled object space for the view matrix, distance in world space)
+    '''
+    matrix_world = np.asarray(matrix_world, dtype = np.float64)
+    bound_box = np.asarray(bound_box, dtype = np.float64)
+    scale = np.linalg.norm(matrix_world[:3, :3], axis = 0)
+    if scale[2] == 0:
+        return default_view_distance, default_view_distance
+
+    corners = (bound_box - np.mean(bound_box, axis = 0)) * scale * (1 + framing.margin)
+    distances = np.maximum(corners[:, 2] + np.abs(corners[:, 0]) / framing.tan_x,
+                           corners[:, 2] + np.abs(corners[:, 1]) / framing.tan_y)
+    world_distance = float(np.max(distances))
+    if world_distance <= 0:
+        return default_view_distance, default_view_distance
+    return float(world_distance / scale[2]), world_distance
+
+def translation_matrix(translation):
+    matrix = np.identity(4)
+    matrix[:3, 3] = translation
+    return matrix
+
+# np.matmul only exists since NumPy 1.10, Blender 2.73 ships 1.9
+def multiply_matrix_arrays(a, b):
+    return np.einsum("nij,njk->nik", a, b)
+
+def identity_matrices(amount):
+    return np.tile(np.identity(4), (amount, 1, 1))
+
+# locations, quaternions and scales of identity matrices
+def identity_parts(amount):
+    quaternions = np.zeros((amount, 4))
+    quaternions[:, 0] = 1
+    return np.zeros((amount, 3)), quaternions, np.ones((amount, 3))
+
+
+# Matrix.lerp in Blender decomposes both matrices into location, rotation and scale,
+# interpolates these parts (the rotation with slerp) and composes them again.
+# The functions below do the same for many matrices at once.
+
+def decompose_matrices(matrices):
+    matrices = np.asarray(matrices, dtype = np.float64).reshape(-1, 4, 4)
+    locations = matrices[:, :3, 3].copy()
+    rotations = matrices[:, :3, :3].copy()
+
+    scales = np.linalg.norm(rotations, axis = 1)
+    rotations /= np.where(scales == 0, 1, scales)[:, np.newaxis, :]
+    negative = np.linalg.det(rotations) < 0
+    rotations[negative] *= -1
+    scales[negative] *= -1
+
+    return locations, rotation_matrices_to_quaternions(rotations), scales
+
+def blend_matrices(parts_a, parts_b, indices_a, indices_b, factors):
+    locations_a, quaternions_a, scales_a = parts_a
+    locations_b, quaternions_b, scales_b = parts_b
+    factors = np.asarray(factors, dtype = np.float64)
+    return compose_matrices(
+        lerp_arrays(locations_a[indices_a], locations_b[indices_b], factors),
+        slerp_quaternions(quaternions_a[indices_a], quaternions_b[indices_b], factors),
+        lerp_arrays(scales_a[indices_a], scales_b[indices_b], factors))
+
+def lerp_arrays(a, b, factors):
+    factors = factors[:, np.newaxis]
+    return a * (1 - factors) + b * factors
+
+def slerp_quaternions(q1, q2, factors):
+    cosom = np.sum(q1 * q2, axis = 1)
+    q1 = np.where((cosom < 0)[:, np.newaxis], -q1, q1)
+    cosom = np.abs(cosom)
+
+    use_slerp = (1 - cosom) > 0.0001
+    omega = np.arccos(np.minimum(cosom, 1))
+    sinom = np.where(use_slerp, np.sin(omega), 1)
+    factors_1 = np.where(use_slerp, np.sin((1 - factors) * omega) / sinom, 1 - factors)
+    factors_2 = np.where(use_slerp, np.sin(factors * omega) / sinom, factors)
+    return q1 * factors_1[:, np.newaxis] + q2 * factors_2[:, np.newaxis]
+
+def compose_matrices(locations, quaternions, scales):
+    w, x, y, z = quaternions.T
+    rotations = np.empty((len(quaternions), 3, 3))
+    rotations[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    rotations[:, 0, 1] = 2 * (x * y - w * z)
+    rotations[:, 0, 2] = 2 * (x * z + w * y)
+    rotations[:, 1, 0] = 2 * (x * y + w * z)
+    rotations[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    rotations[:, 1, 2] = 2 * (y * z - w * x)
+    rotations[:, 2, 0] = 2 * (x * z - w * y)
+    rotations[:, 2, 1] = 2 * (y * z + w * x)
+    rotations[:, 2, 2] = 1 - 2 * (x * x + y * y)
+
+    matrices = identity_matrices(len(quaternions))
+    matrices[:, :3, :3] = rotations * scales[:, np.newaxis, :]
+    matrices[:, :3, 3] = locations
+    return matrices
+
+# scalar versions of compose_matrices and np.dot for single 4x4 matrices as nested lists
+
+def compose_matrix(location, quaternion, scale):
+    w, x, y, z = quaternion
+    sx, sy, sz = scale
+    return [[(1 - 2 * (y * y + z * z)) * sx, 2 * (x * y - w * z) * sy, 2 * (x * z + w * y) * sz, location[0]],
+            [2 * (x * y + w * z) * sx, (1 - 2 * (x * x + z * z)) * sy, 2 * (y * z - w * x) * sz, location[1]],
+            [2 * (x * z - w * y) * sx, 2 * (y * z + w * x) * sy, (1 - 2 * (x * x + y * y)) * sz, location[2]],
+            [0.0, 0.0, 0.0, 1.0]]
+
+def multiply_matrices(a, b):
+    columns = list(zip(*b))
+    return [[sum(x * y for x, y in zip(row, column)) for column in columns] for row in a]
+
+# same case distinction as mat3_to_quat in Blender
+def rotation_matrices_to_quaternions(rotations):
+    r = rotations
+    trace = 0.25 * (1 + r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2])
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        s = np.sqrt(np.maximum(trace, 0))
+        by_trace = np.column_stack((s, (r[:, 2, 1] - r[:, 1, 2]) / (4 * s),
+                                       (r[:, 0, 2] - r[:, 2, 0]) / (4 * s),
+                                       (r[:, 1, 0] - r[:, 0, 1]) / (4 * s)))
+
+        s = 2 * np.sqrt(np.maximum(1 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2], 0))
+        by_x = np.column_stack(((r[:, 2, 1] - r[:, 1, 2]) / s, 0.25 * s,
+                                (r[:, 0, 1] + r[:, 1, 0]) / s,
+                                (r[:, 0, 2] + r[:, 2, 0]) / s))
+
+        s = 2 * np.sqrt(np.maximum(1 + r[:, 1, 1] - r[:, 0, 0] - r[:, 2, 2], 0))
+        by_y = np.column_stack(((r[:, 0, 2] - r[:, 2, 0]) / s,
+                                (r[:, 0, 1] + r[:, 1, 0]) / s, 0.25 * s,
+                                (r[:, 1, 2] + r[:, 2, 1]) / s))
+
+        s = 2 * np.sqrt(np.maximum(1 + r[:, 2, 2] - r[:, 0, 0] - r[:, 1, 1], 0))
+        by_z = np.column_stack(((r[:, 1, 0] - r[:, 0, 1]) / s,
+                                (r[:, 0, 2] + r[:, 2, 0]) / s,
+                                (r[:, 1, 2] + r[:, 2, 1]) / s, 0.25 * s))
+
+    x_is_largest = (r[:, 0, 0] > r[:, 1, 1]) & (r[:, 0, 0] > r[:, 2, 2])
+    y_is_largest = ~x_is_largest & (r[:, 1, 1] > r[:, 2, 2])
+    quaternions = np.where((trace > 1.192092896e-07)[:, np.newaxis], by_trace,
+                  np.where(x_is_largest[:, np.newaxis], by_x,
+                  np.where(y_is_largest[:, np.newaxis], by_y, by_z)))
+
+    lengths = np.linalg.norm(quaternions, axis = 1)
+    return quaternions / np.where(lengths == 0, 1, lengths)[:, np.newaxis]
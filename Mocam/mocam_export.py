@@ -0,0 +1,148 @@
+'''
+Copyright (C) 2014 Jacques Lucke
+mail@jlucke.com
+
+Created by Jacques Lucke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Reading and writing of exported camera paths, without any dependency on
+Blender so that other tools can use it.
+
+Every frame is one record:
+    frame, matrix_world (4x4, row major), focus_distance, target_index (-1 without target)
+
+Formats:
+    BINARY - header followed by fixed size little endian records, see read_binary_path
+    CSV - one line per frame, the matrix is flattened to m00 ... m33
+    JSONL - one JSON object per line
+'''
+
+import json
+import struct
+import numpy as np
+
+magic_bytes = b"MOCAMPTH"
+format_version = 1
+# magic, version, header size, record amount
+header_struct = struct.Struct("<8sIIQ")
+header_size_bytes = 64
+
+record_dtype = np.dtype([
+    ("frame", "<f8"),
+    ("matrix_world", "<f8", (4, 4)),
+    ("focus_distance", "<f8"),
+    ("target_index", "<i8")])
+
+matrix_column_names = ["m{}{}".format(row, column) for row in range(4) for column in range(4)]
+
+
+def write_path(filepath, chunks, file_format = "BINARY"):
+    '''
+    Write the (frames, matrices, focus distances, target indices) chunks one
+    after another, so that only one chunk has to be in memory at a time.
+    Returns the amount of written frames.
+    '''
+    writer_type = {"BINARY": BinaryPathWriter, "CSV": CSVPathWriter, "JSONL": JSONLinesPathWriter}[file_format]
+    with writer_type(filepath) as writer:
+        for chunk in chunks:
+            writer.write_chunk(*chunk)
+        return writer.record_amount
+
+
+class PathWriter:
+    mode = "w"
+
+    def __init__(self, filepath):
+        self.file = open(filepath, self.mode)
+        self.record_amount = 0
+        self.write_header()
+
+    def write_header(self):
+        pass
+
+    def write_chunk(self, frames, matrices, focus_distances, target_indices):
+        self.write_records(frames, np.reshape(matrices, (-1, 16)), focus_distances, target_indices)
+        self.record_amount += len(frames)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+class BinaryPathWriter(PathWriter):
+    mode = "wb"
+
+    def write_header(self):
+        header = header_struct.pack(magic_bytes, format_version, header_size_bytes, self.record_amount)
+        self.file.write(header.ljust(header_size_bytes, b"\0"))
+
+    def write_records(self, frames, matrices, focus_distances, target_indices):
+        records = np.empty(len(frames), dtype = record_dtype)
+        records["frame"] = frames
+        records["matrix_world"] = np.reshape(matrices, (-1, 4, 4))
+        records["focus_distance"] = focus_distances
+        records["target_index"] = target_indices
+        self.file.write(records.tobytes())
+
+    def close(self):
+        # the record amount is only known at the end
+        self.file.seek(0)
+        self.write_header()
+        self.file.close()
+
+
+class CSVPathWriter(PathWriter):
+    def write_header(self):
+        self.file.write(",".join(["frame"] + matrix_column_names + ["focus_distance", "target_index"]) + "\n")
+
+    def write_records(self, frames, matrices, focus_distances, target_indices):
+        lines = []
+        for frame, matrix, focus_distance, target_index in zip(frames.tolist(), matrices.tolist(), focus_distances.tolist(), target_indices.tolist()):
+            lines.append(",".join([repr(frame)] + [repr(value) for value in matrix] + [repr(focus_distance), str(target_index)]))
+        self.file.write("\n".join(lines) + "\n")
+
+
+class JSONLinesPathWriter(PathWriter):
+    def write_records(self, frames, matrices, focus_distances, target_indices):
+        lines = []
+        for frame, matrix, focus_distance, target_index in zip(frames.tolist(), matrices.tolist(), focus_distances.tolist(), target_indices.tolist()):
+            lines.append(json.dumps({
+                "frame": frame,
+                "matrix_world": [matrix[0:4], matrix[4:8], matrix[8:12], matrix[12:16]],
+                "focus_distance": focus_distance,
+                "target_index": target_index}))
+        self.file.write("\n".join(lines) + "\n")
+
+
+def read_binary_path(filepath):
+    '''
+    Memory-map a file written with the BINARY format.
+    The result is a structured array with the fields of record_dtype.
+    '''
+    with open(filepath, "rb") as file:
+        magic, version, header_size, record_amount = header_struct.unpack(file.read(header_struct.size))
+    if magic != magic_bytes:
+        raise ValueError("not a Mocam path file: " + filepath)
+    if version != format_version:
+        raise ValueError("unsupported Mocam path version {}: {}".format(version, filepath))
+    if record_amount == 0:
+        return np.zeros(0, dtype = record_dtype)
+    return np.memmap(filepath, dtype = record_dtype, mode = "r", offset = header_size, shape = (record_amount,))
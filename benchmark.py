@@ -0,0 +1,334 @@
+'''
+Copyright (C) 2014 Jacques Lucke
+mail@jlucke.com
+
+Created by Jacques Lucke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Benchmarks for Mocam on synthetic scenes.
+
+Blender benchmarks (every scene is built in its own background Blender process):
+    blender -b --factory-startup --python benchmark.py -- --output results.json
+    blender -b --factory-startup --python benchmark.py -- --objects 1000 --targets 10 100 --cameras 1
+
+Benchmarks of the core calculation only, in a normal Python process:
+    python benchmark.py --core --output core_results.json
+
+The results of two runs can be compared with:
+    python benchmark.py --compare old.json new.json
+'''
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import subprocess
+from types import SimpleNamespace
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+# the Mocam package for the Blender benchmarks, its Blender independent
+# modules directly for the core benchmarks (the package __init__ needs bpy)
+for directory in (script_directory, os.path.join(script_directory, "Mocam")):
+    if directory not in sys.path:
+        sys.path.append(directory)
+
+CASE_RESULT_PREFIX = "MOCAM_BENCHMARK_RESULT "
+
+
+def measure(function, repeat = 1):
+    times = []
+    for i in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start_time)
+    return {
+        "repeat": repeat,
+        "min": min(times),
+        "mean": sum(times) / repeat,
+        "max": max(times) }
+
+
+# blender benchmarks
+
+class LayoutRecorder:
+    def __init__(self):
+        self.calls = 0
+
+    def row(self, *args, **kwargs):
+        return self.record()
+    def column(self, *args, **kwargs):
+        return self.record()
+    def box(self, *args, **kwargs):
+        return self.record()
+    def split(self, *args, **kwargs):
+        return self.record()
+
+    def operator(self, *args, **kwargs):
+        self.calls += 1
+        return SimpleNamespace()
+
+    def prop(self, *args, **kwargs):
+        self.calls += 1
+    def label(self, *args, **kwargs):
+        self.calls += 1
+    def separator(self, *args, **kwargs):
+        self.calls += 1
+    def template_list(self, *args, **kwargs):
+        self.calls += 1
+
+    def record(self):
+        self.calls += 1
+        return self
+
+# calls the methods of a panel class with a recording layout
+class PanelStandIn:
+    def __init__(self, panel_class):
+        self.panel_class = panel_class
+        self.layout = LayoutRecorder()
+
+    def __getattr__(self, name):
+        return getattr(self.panel_class, name).__get__(self)
+
+class SyntheticScene:
+    def __init__(self, object_amount, target_amount, move_amount, camera_amount):
+        import Mocam
+        self.Mocam = Mocam
+        self.scene = bpy.context.scene
+        self.object_amount = object_amount
+        self.target_amount = min(target_amount, object_amount)
+        self.move_amount = max(move_amount, self.target_amount)
+        self.camera_amount = camera_amount
+
+    def create_objects(self):
+        mesh = bpy.data.meshes.new("Benchmark Mesh")
+        mesh.from_pydata([(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], [],
+                         [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)])
+        random.seed(0)
+        self.objects = []
+        for i in range(self.object_amount):
+            object = bpy.data.objects.new("Object {}".format(i), mesh)
+            object.location = (random.uniform(-100, 100), random.uniform(-100, 100), random.uniform(-10, 10))
+            object.rotation_euler = (random.uniform(-1, 1), random.uniform(-1, 1), random.uniform(-1, 1))
+            self.scene.objects.link(object)
+            self.objects.append(object)
+        self.targets = self.objects[:self.target_amount]
+
+    def create_cameras(self):
+        self.cameras = []
+        for i in range(self.camera_amount):
+            camera = bpy.data.objects.new("Mocam {}".format(i), bpy.data.cameras.new("Mocam {}".format(i)))
+            self.scene.objects.link(camera)
+            camera.data.mocam.active = True
+            self.cameras.append(camera)
+        self.scene.camera = self.cameras[0]
+
+    def add_targets(self):
+        target_names = {object.name for object in self.targets}
+        for object in self.scene.objects:
+            object.select = object.name in target_names
+        for camera in self.cameras:
+            self.scene.mocam.selected_camera_name = camera.name
+            bpy.ops.mocam.add_targets()
+        for camera in self.cameras:
+            self.Mocam.Mocam(camera).create_missing_move_items(self.move_amount)
+
+    def run(self):
+        timings = {}
+        self.scene.frame_set(1)
+        timings["create_objects"] = measure(self.create_objects)
+        self.create_cameras()
+        timings["add_targets"] = measure(self.add_targets)
+
+        mocam = self.Mocam.Mocam(self.cameras[0])
+        def correct_target_list_cold():
+            self.Mocam.invalidate_caches(self.scene)
+            mocam.correct_target_list()
+        timings["correct_target_list_cold"] = measure(correct_target_list_cold, repeat = 5)
+        timings["correct_target_list"] = measure(mocam.correct_target_list, repeat = 5)
+
+        def update_mocams_cold():
+            self.Mocam.invalidate_caches(self.scene)
+            self.Mocam.update_mocams(self.scene)
+        timings["update_mocams_cold"] = measure(update_mocams_cold, repeat = 5)
+        timings["update_mocams_idle"] = measure(lambda: self.Mocam.update_mocams(self.scene), repeat = 50)
+
+        self.scene.mocam.selected_camera_name = self.cameras[0].name
+        context = SimpleNamespace(scene = self.scene, selected_objects = self.targets, active_object = self.targets[-1] if self.targets else None)
+        panel = PanelStandIn(self.Mocam.MocamPanel)
+        timings["panel_draw"] = measure(lambda: panel.draw(context), repeat = 10)
+
+        frames = range(1, 101)
+        scrubbing = measure(lambda: [self.scene.frame_set(frame) for frame in frames])
+        timings["frame_scrubbing_per_frame"] = {key: value / len(frames) if key != "repeat" else value for key, value in scrubbing.items()}
+
+        frames = [frame * 0.25 for frame in range(4 * 1000)]
+        timings["calculate_range_4000"] = measure(lambda: self.Mocam.MocamCalculator(mocam).calculate_range(frames), repeat = 3)
+        return timings
+
+def run_blender_case(args):
+    case = SyntheticScene(args.objects[0], args.targets[0], args.moves[0], args.cameras[0])
+    case.Mocam.register()
+    result = {
+        "objects": case.object_amount,
+        "targets": case.target_amount,
+        "moves": case.move_amount,
+        "cameras": case.camera_amount,
+        "timings": case.run() }
+    print(CASE_RESULT_PREFIX + json.dumps(result))
+    sys.stdout.flush()
+
+def run_blender_benchmarks(args):
+    import Mocam
+    cases = []
+    for objects, targets, moves, cameras in itertools.product(args.objects, args.targets, args.moves, args.cameras):
+        if targets > objects:
+            continue
+        command = [bpy.app.binary_path, "--background", "--factory-startup", "--python", os.path.abspath(__file__), "--",
+                   "--case", "--objects", str(objects), "--targets", str(targets), "--moves", str(moves), "--cameras", str(cameras)]
+        process = subprocess.Popen(command, stdout = subprocess.PIPE, stderr = subprocess.PIPE, universal_newlines = True)
+        stdout, stderr = process.communicate()
+        results = [line[len(CASE_RESULT_PREFIX):] for line in stdout.splitlines() if line.startswith(CASE_RESULT_PREFIX)]
+        if len(results) > 0:
+            cases.append(json.loads(results[-1]))
+        else:
+            cases.append({"objects": objects, "targets": targets, "moves": moves, "cameras": cameras, "error": stderr[-2000:]})
+        print_case(cases[-1])
+
+    return {
+        "kind": "blender",
+        "mocam_version": Mocam.bl_info["version"],
+        "blender_version": bpy.app.version_string,
+        "cases": cases }
+
+
+# core benchmarks
+
+def run_core_benchmarks(args):
+    import numpy as np
+    import mocam_core
+
+    cases = []
+    random.seed(0)
+    np.random.seed(0)
+    for targets in args.targets:
+        quaternions = np.random.normal(size = (targets, 4))
+        quaternions /= np.linalg.norm(quaternions, axis = 1)[:, np.newaxis]
+        positions = mocam_core.compose_matrices(np.random.uniform(-100, 100, size = (targets, 3)), quaternions, np.ones((targets, 3)))
+
+        loads = [random.uniform(5, 20) for i in range(targets)]
+        stays = [random.uniform(0, 10) for i in range(targets)]
+        poses = mocam_core.TargetPoses(positions)
+        timeline = mocam_core.Timeline(loads, stays, list(range(targets)))
+        calculator = mocam_core.Calculator(timeline, poses)
+        end_frame = timeline.get_end_frame(targets - 1)
+
+        single_frames = [random.uniform(0, end_frame) for i in range(1000)]
+        range_frames = np.linspace(0, end_frame, 10000)
+        timings = {
+            "timeline": measure(lambda: mocam_core.Timeline(loads, stays, list(range(targets))), repeat = 10),
+            "get_move_data_1000": measure(lambda: [timeline.get_move_data(frame) for frame in single_frames], repeat = 5),
+            "calculate_1000": measure(lambda: [calculator.calculate(frame) for frame in single_frames], repeat = 3),
+            "calculate_range_10000": measure(lambda: calculator.calculate_range(range_frames), repeat = 3) }
+        cases.append({"targets": targets, "timings": timings})
+        print_case(cases[-1])
+
+    return {
+        "kind": "core",
+        "numpy_version": np.__version__,
+        "python_version": sys.version.split()[0],
+        "cases": cases }
+
+
+# reports
+
+def print_case(case):
+    name = ", ".join("{} {}".format(case[key], key) for key in ("objects", "targets", "moves", "cameras") if key in case)
+    print(name, file = sys.stderr)
+    if "error" in case:
+        print("    failed: " + case["error"].strip().splitlines()[-1] if case["error"].strip() else "    failed", file = sys.stderr)
+    for key, timing in case.get("timings", {}).items():
+        print("    {:<30} {:10.3f} ms".format(key, timing["mean"] * 1000), file = sys.stderr)
+
+def compare_reports(old_path, new_path):
+    with open(old_path) as file:
+        old_cases = json.load(file)["cases"]
+    with open(new_path) as file:
+        new_cases = json.load(file)["cases"]
+
+    def case_key(case):
+        return tuple(case.get(key) for key in ("objects", "targets", "moves", "cameras"))
+    old_by_key = {case_key(case): case for case in old_cases}
+
+    for case in new_cases:
+        old_case = old_by_key.get(case_key(case))
+        if old_case is None:
+            continue
+        print(", ".join("{} {}".format(value, key) for key, value in zip(("objects", "targets", "moves", "cameras"), case_key(case)) if value is not None))
+        for key, timing in case.get("timings", {}).items():
+            if key in old_case.get("timings", {}):
+                old_mean = old_case["timings"][key]["mean"]
+                new_mean = timing["mean"]
+                ratio = new_mean / old_mean if old_mean > 0 else float("inf")
+                print("    {:<30} {:10.3f} ms -> {:10.3f} ms  ({:.2f}x)".format(key, old_mean * 1000, new_mean * 1000, ratio))
+
+
+def get_arguments():
+    arguments = sys.argv[1:]
+    if bpy is not None:
+        arguments = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(description = "Benchmark Mocam on synthetic scenes")
+    parser.add_argument("--objects", type = int, nargs = "+", default = [1000, 10000, 50000])
+    parser.add_argument("--targets", type = int, nargs = "+", default = [10, 100, 1000])
+    parser.add_argument("--moves", type = int, nargs = "+", default = [0], help = "Amount of moves per camera (at least one per target)")
+    parser.add_argument("--cameras", type = int, nargs = "+", default = [1, 4], help = "Amount of active Mocam cameras")
+    parser.add_argument("--output", default = "", help = "Write the results as JSON into this file")
+    parser.add_argument("--core", action = "store_true", help = "Only benchmark mocam_core, does not need Blender")
+    parser.add_argument("--compare", nargs = 2, metavar = ("OLD", "NEW"), help = "Compare two result files")
+    parser.add_argument("--case", action = "store_true", help = "Run a single case in this process (used internally)")
+    return parser.parse_args(arguments)
+
+def main():
+    args = get_arguments()
+    if args.compare:
+        compare_reports(*args.compare)
+        return
+    if args.case:
+        run_blender_case(args)
+        return
+
+    if args.core or bpy is None:
+        report = run_core_benchmarks(args)
+    else:
+        report = run_blender_benchmarks(args)
+
+    text = json.dumps(report, indent = 2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# the package __init__ needs bpy, so the Blender independent
+# modules are imported directly from the package directory
+package_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Mocam")
+if package_directory not in sys.path:
+    sys.path.insert(0, package_directory)
@@ -0,0 +1,290 @@
+'''
+Tests for the parts of Mocam that don't need Blender.
+Run with "python -m pytest" in this directory, conftest.py makes the
+modules of the Mocam package importable without Blender.
+'''
+
+import os
+import json
+import random
+import numpy as np
+import pytest
+
+import mocam_core
+import mocam_export
+
+
+def random_positions(amount, seed = 0):
+    generator = np.random.RandomState(seed)
+    quaternions = generator.normal(size = (amount, 4))
+    quaternions /= np.linalg.norm(quaternions, axis = 1)[:, np.newaxis]
+    locations = generator.uniform(-100, 100, size = (amount, 3))
+    scales = generator.uniform(0.5, 2, size = (amount, 3))
+    return mocam_core.compose_matrices(locations, quaternions, scales)
+
+def make_calculator(loads, stays, target_indices, target_amount = None):
+    if target_amount is None:
+        target_amount = len(loads)
+    timeline = mocam_core.Timeline(loads, stays, target_indices)
+    poses = mocam_core.TargetPoses(random_positions(target_amount))
+    return mocam_core.Calculator(timeline, poses)
+
+def frames_for(calculator, amount = 500):
+    timeline = calculator.timeline
+    end_frame = timeline.get_end_frame(timeline.move_amount - 1) if timeline.move_amount > 0 else 10
+    # also before the start and after the end
+    return np.linspace(-5, end_frame + 5, amount)
+
+def assert_range_matches_single_frames(calculator, frames):
+    matrices, focus_distances = calculator.calculate_range(frames)
+    assert matrices.shape == (len(frames), 4, 4)
+    assert focus_distances.shape == (len(frames), )
+    for frame, matrix, focus_distance in zip(frames, matrices, focus_distances):
+        expected_matrix, expected_focus_distance = calculator.calculate(frame)
+        np.testing.assert_allclose(matrix, expected_matrix, atol = 1e-9)
+        assert focus_distance == pytest.approx(expected_focus_distance)
+
+
+# Timeline
+
+def test_timeline_end_frames():
+    timeline = mocam_core.Timeline([0, 10, 5], [2, 3, 0], [0, 1, 2])
+    assert timeline.move_amount == 3
+    assert [timeline.get_end_frame(i) for i in range(3)] == [2, 15, 20]
+    assert [timeline.get_start_frame(i) for i in range(3)] == [0, 2, 15]
+
+def test_timeline_find_move_index_is_clamped():
+    timeline = mocam_core.Timeline([0, 10], [2, 3], [0, 1])
+    assert timeline.find_move_index(-100) == 0
+    assert timeline.find_move_index(0) == 0
+    assert timeline.find_move_index(2) == 1
+    assert timeline.find_move_index(14.9) == 1
+    assert timeline.find_move_index(1000) == 1
+
+def test_empty_timeline():
+    timeline = mocam_core.Timeline([], [], [])
+    assert timeline.move_amount == 0
+    assert timeline.last_target_index is None
+    assert timeline.get_move_data(5).has_no_targets
+
+def test_timeline_with_missing_targets():
+    timeline = mocam_core.Timeline([0, 10, 10], [5, 5, 5], [0, 2])
+    assert timeline.has_target(0)
+    assert not timeline.has_target(1)
+    move_data = timeline.get_move_data(12)
+    assert move_data.move_index == 1
+    assert move_data.target_start == 0
+    assert move_data.target_end is None
+
+def test_timeline_move_data_progress():
+    timeline = mocam_core.Timeline([0, 10], [0, 10], [0, 1])
+    move_data = timeline.get_move_data(5)
+    assert move_data.has_both_targets
+    assert move_data.is_moving
+    assert move_data.move_progress == pytest.approx(0.5)
+    assert not timeline.get_move_data(15).is_moving
+
+
+# Calculator
+
+def test_calculate_range_matches_calculate():
+    random.seed(0)
+    amount = 8
+    loads = [random.uniform(1, 20) for i in range(amount)]
+    stays = [random.uniform(0, 10) for i in range(amount)]
+    calculator = make_calculator(loads, stays, list(range(amount)))
+    assert_range_matches_single_frames(calculator, frames_for(calculator))
+
+def test_calculate_range_with_zero_loads():
+    calculator = make_calculator([0, 0, 10, 0], [5, 0, 5, 5], [0, 1, 2, 3])
+    frames = np.concatenate([frames_for(calculator), [5, 15, 20]])
+    assert_range_matches_single_frames(calculator, frames)
+
+def test_calculate_range_with_missing_targets():
+    calculator = make_calculator([0, 10, 10, 10], [5, 5, 5, 5], [0, 2], target_amount = 4)
+    assert_range_matches_single_frames(calculator, frames_for(calculator))
+
+def test_calculate_range_with_more_moves_than_targets():
+    calculator = make_calculator([0, 10, 10, 10, 10], [5, 5, 5, 5, 5], [0, 1], target_amount = 2)
+    assert_range_matches_single_frames(calculator, frames_for(calculator))
+
+def test_calculate_range_without_targets():
+    calculator = make_calculator([0, 10], [5, 5], [], target_amount = 0)
+    matrices, focus_distances = calculator.calculate_range(frames_for(calculator, 20))
+    np.testing.assert_array_equal(matrices, mocam_core.identity_matrices(20))
+    np.testing.assert_array_equal(focus_distances, np.ones(20))
+    assert_range_matches_single_frames(calculator, frames_for(calculator, 20))
+
+def test_calculate_range_with_empty_timeline():
+    calculator = make_calculator([], [], [])
+    matrices, focus_distances = calculator.calculate_range([1, 2, 3])
+    np.testing.assert_array_equal(matrices, mocam_core.identity_matrices(3))
+    assert calculator.calculate_range([])[0].shape == (0, 4, 4)
+
+def test_iterate_range_matches_calculate_range():
+    calculator = make_calculator([0, 10, 10], [5, 5, 5], [0, 1, 2])
+    frames = frames_for(calculator, 100)
+    chunks = list(calculator.iterate_range(frames, chunk_size = 30))
+    assert [len(chunk[0]) for chunk in chunks] == [30, 30, 30, 10]
+    matrices, focus_distances = calculator.calculate_range(frames)
+    np.testing.assert_allclose(np.concatenate([chunk[1] for chunk in chunks]), matrices)
+    np.testing.assert_allclose(np.concatenate([chunk[2] for chunk in chunks]), focus_distances)
+
+def test_active_targets():
+    calculator = make_calculator([0, 10], [5, 5], [0, 1])
+    np.testing.assert_array_equal(calculator.get_active_targets([0, 8, 20]), [0, 1, 1])
+    empty_calculator = make_calculator([], [], [])
+    np.testing.assert_array_equal(empty_calculator.get_active_targets([0, 1]), [-1, -1])
+
+
+# framing
+
+def test_field_of_view_with_horizontal_sensor_fit():
+    tan_x, tan_y = mocam_core.calc_field_of_view_tangents(50, 36, 24, "HORIZONTAL", 0.5)
+    assert tan_x == pytest.approx(0.36)
+    assert tan_y == pytest.approx(0.72)
+
+def test_field_of_view_with_vertical_sensor_fit():
+    tan_x, tan_y = mocam_core.calc_field_of_view_tangents(50, 36, 24, "VERTICAL", 2)
+    assert tan_x == pytest.approx(0.48)
+    assert tan_y == pytest.approx(0.24)
+
+def test_field_of_view_with_auto_sensor_fit():
+    # the sensor width is used for the larger side of the image
+    tan_x, tan_y = mocam_core.calc_field_of_view_tangents(50, 36, 24, "AUTO", 2)
+    assert tan_x == pytest.approx(0.36)
+    assert tan_y == pytest.approx(0.18)
+    tan_x, tan_y = mocam_core.calc_field_of_view_tangents(50, 36, 24, "AUTO", 0.5)
+    assert tan_x == pytest.approx(0.18)
+    assert tan_y == pytest.approx(0.36)
+
+unit_cube = [(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)]
+
+def test_framing_distances():
+    framing = mocam_core.Framing(1, 1, 0)
+    assert mocam_core.calc_framing_distances(np.identity(4), unit_cube, framing) == pytest.approx((2, 2))
+    # the narrower side decides
+    framing = mocam_core.Framing(0.5, 1, 0)
+    assert mocam_core.calc_framing_distances(np.identity(4), unit_cube, framing) == pytest.approx((3, 3))
+
+def test_framing_distances_with_margin():
+    framing = mocam_core.Framing(1, 1, 0.5)
+    assert mocam_core.calc_framing_distances(np.identity(4), unit_cube, framing) == pytest.approx((3, 3))
+
+def test_framing_distances_with_scale():
+    framing = mocam_core.Framing(1, 1, 0)
+    matrix_world = mocam_core.compose_matrix([10, 0, 0], [1, 0, 0, 0], [2, 2, 2])
+    view_distance, world_distance = mocam_core.calc_framing_distances(matrix_world, unit_cube, framing)
+    assert world_distance == pytest.approx(4)
+    # the view matrix is applied in the scaled object space
+    assert view_distance == pytest.approx(2)
+
+def test_framing_distances_with_flat_object():
+    framing = mocam_core.Framing(1, 1, 0)
+    matrix_world = mocam_core.compose_matrix([0, 0, 0], [1, 0, 0, 0], [1, 1, 0])
+    distances = mocam_core.calc_framing_distances(matrix_world, unit_cube, framing)
+    assert distances == (mocam_core.default_view_distance, mocam_core.default_view_distance)
+
+
+# export
+
+def export_chunks(calculator, frames, chunk_size = 64):
+    return calculator.iterate_range(frames, chunk_size)
+
+def test_binary_path_round_trip(tmpdir):
+    calculator = make_calculator([0, 10, 10], [5, 5, 5], [0, 1, 2])
+    frames = frames_for(calculator, 200)
+    filepath = str(tmpdir.join("path.mcp"))
+    assert mocam_export.write_path(filepath, export_chunks(calculator, frames)) == 200
+
+    records = mocam_export.read_binary_path(filepath)
+    matrices, focus_distances = calculator.calculate_range(frames)
+    np.testing.assert_array_equal(records["frame"], frames)
+    np.testing.assert_array_equal(records["matrix_world"], matrices)
+    np.testing.assert_array_equal(records["focus_distance"], focus_distances)
+    np.testing.assert_array_equal(records["target_index"], calculator.get_active_targets(frames))
+
+def test_binary_path_without_frames(tmpdir):
+    filepath = str(tmpdir.join("empty.mcp"))
+    assert mocam_export.write_path(filepath, []) == 0
+    assert len(mocam_export.read_binary_path(filepath)) == 0
+
+def test_read_binary_path_rejects_other_files(tmpdir):
+    filepath = tmpdir.join("other.mcp")
+    filepath.write_binary(b"\0" * mocam_export.header_size_bytes)
+    with pytest.raises(ValueError):
+        mocam_export.read_binary_path(str(filepath))
+
+def test_csv_path(tmpdir):
+    calculator = make_calculator([0, 10], [5, 5], [0, 1])
+    frames = frames_for(calculator, 50)
+    filepath = tmpdir.join("path.csv")
+    assert mocam_export.write_path(str(filepath), export_chunks(calculator, frames, 20), "CSV") == 50
+
+    lines = filepath.read().splitlines()
+    assert len(lines) == 51
+    assert len(lines[0].split(",")) == 19
+    values = lines[1].split(",")
+    matrix, focus_distance = calculator.calculate(frames[0])
+    assert float(values[0]) == frames[0]
+    np.testing.assert_array_equal([float(value) for value in values[1:17]], np.ravel(matrix))
+    assert float(values[17]) == focus_distance
+
+def test_jsonl_path(tmpdir):
+    calculator = make_calculator([0, 10], [5, 5], [0, 1])
+    frames = frames_for(calculator, 50)
+    filepath = tmpdir.join("path.jsonl")
+    assert mocam_export.write_path(str(filepath), export_chunks(calculator, frames, 20), "JSONL") == 50
+
+    records = [json.loads(line) for line in filepath.read().splitlines()]
+    assert len(records) == 50
+    matrix, focus_distance = calculator.calculate(frames[-1])
+    np.testing.assert_array_equal(records[-1]["matrix_world"], matrix)
+    assert records[-1]["focus_distance"] == focus_distance
+    assert records[-1]["target_index"] == 1
+
+
+# path cache
+
+def test_path_cache_round_trip(tmpdir):
+    calculator = make_calculator([0, 10], [5, 5], [0, 1])
+    frames = frames_for(calculator, 100)
+    key = mocam_core.calc_path_key(calculator.timeline, calculator.get_pose_arrays(), frames)
+    path_cache = mocam_core.PathCache(str(tmpdir.join("cache")), 1024 * 1024)
+    assert path_cache.load(key) is None
+
+    matrices, focus_distances = calculator.calculate_range(frames)
+    assert path_cache.store(key, matrices, focus_distances)
+    loaded_matrices, loaded_focus_distances = path_cache.load(key)
+    np.testing.assert_array_equal(loaded_matrices, matrices)
+    np.testing.assert_array_equal(loaded_focus_distances, focus_distances)
+
+def test_path_key_depends_on_frames_and_poses():
+    calculator = make_calculator([0, 10], [5, 5], [0, 1])
+    pose_arrays = calculator.get_pose_arrays()
+    key = mocam_core.calc_path_key(calculator.timeline, pose_arrays, [1, 2, 3])
+    assert key == mocam_core.calc_path_key(calculator.timeline, pose_arrays, [1, 2, 3])
+    assert key != mocam_core.calc_path_key(calculator.timeline, pose_arrays, [1, 2, 4])
+    positions, views = pose_arrays
+    moved_positions = positions.copy()
+    moved_positions[0, 0, 3] += 1
+    assert key != mocam_core.calc_path_key(calculator.timeline, (moved_positions, views), [1, 2, 3])
+
+def test_path_cache_size_limit(tmpdir):
+    directory = str(tmpdir.join("cache"))
+    # one path of 100 frames is a bit larger than 100 * 17 * 8 bytes
+    path_cache = mocam_core.PathCache(directory, 100 * 17 * 8 * 2.5)
+    for i, key in enumerate(["a", "b", "c"]):
+        path_cache.store(key, mocam_core.identity_matrices(100), np.ones(100))
+        os.utime(path_cache.get_path(key), (i, i))
+        path_cache.limit_size()
+    assert path_cache.load("a") is None
+    assert path_cache.load("b") is not None
+    assert path_cache.load("c") is not None
+
+def test_path_cache_ignores_write_errors(tmpdir):
+    blocking_file = tmpdir.join("file")
+    blocking_file.write("")
+    path_cache = mocam_core.PathCache(str(blocking_file.join("cache")), 1024 * 1024)
+    assert not path_cache.store("key", mocam_core.identity_matrices(2), np.ones(2))
+    assert path_cache.load("key") is None